@@ -0,0 +1,312 @@
+'''
+Compact binary archive of games, written one game at a time at the end of a
+file and read back from a memory-mapped file one game at a time.
+
+A file starts with MAGIC and VERSION, followed by the games. Each game has
+a GAME header, then its moves:
+
+- The header holds the number of rows of pieces per player (as in
+  CheckerBoard(n)), the result and whether the game has a seed, the seed,
+  the number of moves and the number of bytes of the moves
+- A move takes 2 bytes for its first step and one more byte for each 4
+  steps after it: the number of its start square, then a byte with a jump
+  flag, the number of steps less one and the direction of the first step,
+  then the directions of the other steps, 2 bits each. A multi-jump of
+  LONG_STEPS steps or more has its number of steps less LONG_STEPS in a
+  byte of its own, after the first 2.
+
+Squares are numbered row by row, counting only the dark squares, so boards
+of at most MAX_SQUARES dark squares can be archived, and directions are
+numbered as in DIRECTIONS.
+'''
+import mmap
+import os
+import struct
+
+MAGIC = b"CKRA"
+VERSION = 2
+# rows, flags (result in the low 2 bits, then a bit for the seed), seed,
+# number of moves and number of bytes of the moves
+GAME = struct.Struct("<BBQHI")
+HAS_SEED = 4
+RESULTS = (None, "RED", "BLACK", "DRAW")
+# up_left, up_right, down_left, down_right
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+# the most steps the second byte of a move holds, and the most a move can
+# be packed with, which is more jumps than any board archived allows
+LONG_STEPS = 32
+MAX_STEPS = LONG_STEPS + 0xff
+# the most dark squares a board can have, as start squares take a byte
+MAX_SQUARES = 0x100
+
+def square_number(size, loc):
+    '''
+    Returns: int: the number of the dark square at loc on a board of size
+        rows
+    '''
+    row, col = loc
+    return row * (size // 2) + col // 2
+
+def square_loc(size, number):
+    '''
+    Returns: tuple(int, int): the location of a dark square on a board of
+        size rows
+    '''
+    row, col = divmod(number, size // 2)
+    # dark squares are those with an odd row + col
+    return row, 2 * col + (row + 1) % 2
+
+def pack_move(size, loc, path):
+    '''
+    Packs a move
+
+    Args:
+        size (int): the number of rows (and columns) of the board
+        loc (tuple(int, int)): the location of the piece moved
+        path (list[tuple(int, int)]): the squares it steps or jumps to
+
+    Raises:
+        ValueError if the move has more than MAX_STEPS steps or its steps are
+            not diagonal
+
+    Returns: bytes: the packed move
+    '''
+    if not 0 < len(path) <= MAX_STEPS:
+        raise ValueError
+    jump = abs(path[0][0] - loc[0]) == 2
+    distance = 2 if jump else 1
+    directions = []
+    row, col = loc
+    for next_row, next_col in path:
+        step = ((next_row - row) // distance, (next_col - col) // distance)
+        if step not in DIRECTIONS or abs(next_row - row) != distance or \
+                abs(next_col - col) != distance:
+            raise ValueError
+        directions.append(DIRECTIONS.index(step))
+        row, col = next_row, next_col
+    steps = min(len(path), LONG_STEPS)
+    packed = bytearray((square_number(size, loc),
+                        jump << 7 | (steps - 1) << 2 | directions[0]))
+    if steps == LONG_STEPS:
+        packed.append(len(path) - LONG_STEPS)
+    for first in range(1, len(directions), 4):
+        byte = 0
+        for shift, direction in enumerate(directions[first:first + 4]):
+            byte |= direction << (2 * shift)
+        packed.append(byte)
+    return bytes(packed)
+
+def unpack_moves(size, data, count):
+    '''
+    Unpacks the moves of a game
+
+    Args:
+        size (int): the number of rows (and columns) of the board
+        data (bytes-like): the packed moves
+        count (int): the number of moves
+
+    Returns: list[(tuple(int, int), list[tuple(int, int)])]: the location of
+        the piece moved and the squares it steps or jumps to, for each move
+    '''
+    locs = _locs(size)
+    moves = []
+    offset = 0
+    for _ in range(count):
+        loc = locs[data[offset]]
+        head = data[offset + 1]
+        distance = 2 if head & 0x80 else 1
+        steps = ((head >> 2) & 0x1f) + 1
+        offset += 2
+        if steps == LONG_STEPS:
+            steps += data[offset]
+            offset += 1
+        directions = [head & 3]
+        for shift in range(steps - 1):
+            directions.append(data[offset + shift // 4] >> (2 * (shift % 4))
+                              & 3)
+        offset += (steps + 2) // 4
+        row, col = loc
+        path = []
+        for direction in directions:
+            d_row, d_col = DIRECTIONS[direction]
+            row += distance * d_row
+            col += distance * d_col
+            path.append((row, col))
+        moves.append((loc, path))
+    return moves
+
+_LOCS = {}
+
+def _locs(size):
+    '''
+    Returns: list[tuple(int, int)]: the location of each dark square of a
+        board size, built on first use
+    '''
+    locs = _LOCS.get(size)
+    if locs is None:
+        locs = _LOCS[size] = [square_loc(size, number)
+                              for number in range(size * size // 2)]
+    return locs
+
+def _check_size(rows):
+    '''
+    Returns: int: the size of a board of rows of pieces for each player
+
+    Raises:
+        ValueError if the board has more than MAX_SQUARES dark squares
+    '''
+    size = 2 * rows + 2
+    if size * size // 2 > MAX_SQUARES:
+        raise ValueError
+    return size
+
+
+class GameWriter:
+    '''
+    Appends games to an archive file. A game is written in one go when it is
+    over, so the file never holds part of a game: either all of it is given
+    to write_game(), or its moves are fed one by one between begin_game()
+    and end_game().
+
+    Public Attributes:
+    games (int): the number of games written by this writer
+    '''
+
+    def __init__(self, path):
+        '''
+        Constructor, opening the file and writing its header if it is new or
+        empty
+
+        Args:
+            path (str): the file to append to
+
+        Raises:
+            ValueError if the file is not an archive
+        '''
+        self.__file = open(path, "ab")
+        if self.__file.tell() == 0:
+            self.__file.write(MAGIC + bytes((VERSION,)))
+        else:
+            with open(path, "rb") as file:
+                if file.read(len(MAGIC) + 1) != MAGIC + bytes((VERSION,)):
+                    self.__file.close()
+                    raise ValueError
+        self.games = 0
+        self.__game = None
+
+    def write_game(self, rows, seed, winner, moves):
+        '''
+        Writes a whole game
+
+        Args:
+            rows (int): the number of rows of pieces for each player
+            seed (int): the seed the game was played with, or None
+            winner (str): RED, BLACK or DRAW, or None if the game is not over
+            moves (list): the (loc, path) of each move played
+
+        Raises:
+            ValueError if the board is too big to archive, a move can't be
+                packed or there are too many moves
+        '''
+        size = _check_size(rows)
+        data = b"".join(pack_move(size, loc, path) for loc, path in moves)
+        if len(moves) > 0xffff:
+            raise ValueError
+        flags = RESULTS.index(winner)
+        if seed is not None:
+            flags |= HAS_SEED
+        self.__file.write(GAME.pack(rows, flags, seed or 0, len(moves),
+                                    len(data)) + data)
+        self.games += 1
+
+    def begin_game(self, rows, seed=None):
+        '''
+        Starts a game to feed the moves of with add_move()
+
+        Args:
+            rows (int): the number of rows of pieces for each player
+            seed (int): the seed the game is played with, or None
+
+        Raises:
+            ValueError if the board is too big to archive
+        '''
+        _check_size(rows)
+        self.__game = (rows, seed, [])
+
+    def add_move(self, loc, path):
+        '''
+        Adds a move to the game started with begin_game()
+
+        Args:
+            loc (tuple(int, int)): the location of the piece moved
+            path (list[tuple(int, int)]): the squares it steps or jumps to
+        '''
+        self.__game[2].append((loc, list(path)))
+
+    def end_game(self, winner):
+        '''
+        Writes the game started with begin_game()
+
+        Args:
+            winner (str): RED, BLACK or DRAW, or None if the game is not over
+        '''
+        rows, seed, moves = self.__game
+        self.__game = None
+        self.write_game(rows, seed, winner, moves)
+
+    def flush(self):
+        '''
+        Writes the games out of the buffers of the file
+        '''
+        self.__file.flush()
+
+    def close(self):
+        '''
+        Closes the file
+        '''
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_games(path):
+    '''
+    Reads the games of an archive from a memory-mapped file, one at a time
+
+    Args:
+        path (str): the archive file
+
+    Raises:
+        ValueError if the file is not an archive or a game is cut short
+
+    Returns:
+        generator of dict: the "rows", "seed" (None if not saved), "winner"
+            (RED, BLACK, DRAW or None) and "moves" of each game, a list of
+            (loc, path)
+    '''
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = len(MAGIC) + 1
+            if data[:start] != MAGIC + bytes((VERSION,)):
+                raise ValueError
+            offset = start
+            end = len(data)
+            while offset < end:
+                if offset + GAME.size > end:
+                    raise ValueError
+                rows, flags, seed, count, length = GAME.unpack_from(data,
+                                                                    offset)
+                offset += GAME.size
+                if offset + length > end:
+                    raise ValueError
+                moves = unpack_moves(2 * rows + 2,
+                                     data[offset:offset + length], count)
+                offset += length
+                yield {"rows": rows,
+                       "seed": seed if flags & HAS_SEED else None,
+                       "winner": RESULTS[flags & 3], "moves": moves}
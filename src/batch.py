@@ -0,0 +1,400 @@
+'''
+Batch simulator: plays thousands of games between RandomBot or SmartBot
+players at once, keeping every board of the batch in NumPy arrays and making
+each ply of every game with whole-array operations.
+
+It follows the rules of the board engines (forced captures, multi-jumps that
+stop when a man is kinged, a game ends when a player cannot move and is
+drawn on the third repetition of a position or after draw_plies plies
+without a capture or a promotion, or without draw_plies stopped as a tie
+after MAX_PLIES plies) and the choices of the bots, so its
+results match bot.simulate() statistically. The games themselves differ,
+as the random numbers are drawn differently.
+'''
+import random
+import sys
+import time
+
+import click
+import numpy as np
+
+sys.path.append("./logic")
+from bitboard import BLACK, JUMP_DIRS, RED
+from bot import DRAW_PLIES, MAX_PLIES
+from engines import new_board
+
+# up_left, up_right, down_left, down_right, numbered as the directions of the
+# engines
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+# the order in which the engines try the jump directions, forward first, so
+# that jump paths are listed in their order (SmartBot takes the first one)
+JUMP_ORDER = {"red": np.array(JUMP_DIRS[RED, True]),
+              "black": np.array(JUMP_DIRS[BLACK, True])}
+# red men move down the board and black men move up
+FORWARD = {"red": np.array([False, False, True, True]),
+           "black": np.array([True, True, False, False])}
+POLICIES = ("random", "smart")
+
+class Tables:
+    '''
+    Square tables of a board size. Dark squares are numbered row by row, the
+    order in which the engines list legal moves, and D (the number of dark
+    squares) stands for "off the board" in the step and jump tables.
+
+    Public Attributes:
+    squares (int): the number of dark squares, D
+    step (np.ndarray): (D, 4) the square next to each square in each
+        direction, or D
+    jump (np.ndarray): (D, 4) the square two steps away in each direction,
+        or D
+    crown (dict{str : np.ndarray}): (D,) the squares where red and black
+        men are kinged
+    red, black (np.ndarray): (D,) the squares of the pieces at the start
+    keys (np.ndarray): (4, D) random 64-bit keys of a red man, black man, red
+        king and black king on each square, to hash positions with
+    '''
+
+    def __init__(self, n):
+        '''
+        Constructor
+
+        Args:
+            n (int): the number of rows of pieces for each player
+        '''
+        rows = new_board(n).return_board()
+        size = len(rows)
+        locs = [(i, j) for i in range(size) for j in range(size)
+                if rows[i][j] != 'l']
+        index = {loc: number for number, loc in enumerate(locs)}
+        self.squares = len(locs)
+        self.step = np.full((self.squares, 4), self.squares)
+        self.jump = np.full((self.squares, 4), self.squares)
+        for number, (i, j) in enumerate(locs):
+            for k, (di, dj) in enumerate(DIRECTIONS):
+                if (i + di, j + dj) in index:
+                    self.step[number, k] = index[i + di, j + dj]
+                    self.jump[number, k] = index.get((i + 2 * di, j + 2 * dj),
+                                                     self.squares)
+        self.crown = {"red": np.array([i == size - 1 for i, _ in locs]),
+                      "black": np.array([i == 0 for i, _ in locs])}
+        self.red = np.array([rows[i][j] == 'r' for i, j in locs])
+        self.black = np.array([rows[i][j] == 'b' for i, j in locs])
+        self.keys = np.random.default_rng(size).integers(
+            0, 1 << 64, (4, self.squares), dtype=np.uint64, endpoint=False)
+
+_TABLES = {}
+
+def get_tables(n):
+    '''
+    Returns the Tables of a board size, building them on first use
+
+    Args:
+        n (int): the number of rows of pieces for each player
+    '''
+    tables = _TABLES.get(n)
+    if tables is None:
+        tables = _TABLES[n] = Tables(n)
+    return tables
+
+def _pad(mask):
+    '''
+    Returns a (B, D) mask with an extra False column for "off the board"
+    '''
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 1), dtype=bool)
+    padded[:, :-1] = mask
+    return padded
+
+def can_move(tables, own, opp, kings, color):
+    '''
+    Tells for each board whether a player has a move or a jump
+
+    Args:
+        tables (Tables): the tables of the board size
+        own, opp, kings (np.ndarray): (B, D) the pieces of the player, of the
+            opponent and the kings of both
+        color (str): red or black, the color of the player
+
+    Returns: np.ndarray: (B,) whether the player can move
+    '''
+    empty = _pad(~(own | opp))
+    game, start = np.nonzero(own)
+    step, jump = tables.step[start], tables.jump[start]
+    rows = game[:, None]
+    ok = (kings[game, start][:, None] | FORWARD[color]) & \
+        (empty[rows, step] | (_pad(opp)[rows, step] & empty[rows, jump]))
+    result = np.zeros(len(own), dtype=bool)
+    result[game[ok.any(axis=1)]] = True
+    return result
+
+def _hash(tables, red, black, kings):
+    '''
+    Returns: np.ndarray: (B,) the 64-bit hash of the pieces of each board
+    '''
+    key = np.zeros(len(red), dtype=np.uint64)
+    for number, mask in enumerate((red & ~kings, black & ~kings,
+                                   red & kings, black & kings)):
+        key ^= np.bitwise_xor.reduce(
+            np.where(mask, tables.keys[number], np.uint64(0)), axis=1)
+    return key
+
+def _simple_moves(tables, own, opp, kings, color):
+    '''
+    Returns every simple move as arrays of the board, the start square and
+    the end square
+    '''
+    empty = _pad(~(own | opp))
+    game, start = np.nonzero(own)
+    end = tables.step[start]
+    ok = (kings[game, start][:, None] | FORWARD[color]) & \
+        empty[game[:, None], end]
+    row, k = np.nonzero(ok)
+    return game[row], start[row], end[row, k]
+
+def _jumps(tables, own, opp, kings, color):
+    '''
+    Returns every complete jump path, found a hop at a time for all paths at
+    once, as arrays of the board, the start square, the end square, the
+    squares captured ((R, D + 1) mask), the number of hops and whether the
+    piece is kinged at the end
+    '''
+    empty = _pad(~(own | opp))
+    opp = _pad(opp)
+    crown = tables.crown[color]
+    order = JUMP_ORDER[color]
+    forward = FORWARD[color][order]
+    game, start = np.nonzero(own)
+    king = kings[game, start]
+    end = start
+    captured = np.zeros((len(game), tables.squares + 1), dtype=bool)
+    hops = np.zeros(len(game), dtype=int)
+    found = []
+    while len(game):
+        mid = tables.step[end][:, order]
+        land = tables.jump[end][:, order]
+        rows = np.arange(len(game))[:, None]
+        ok = (king[:, None] | forward) & opp[game[:, None], mid] & \
+            ~captured[rows, mid] & empty[game[:, None], land]
+        # a man that has just been kinged stops jumping
+        kinged = ~king & crown[end]
+        ok &= ~kinged[:, None]
+        complete = (hops > 0) & ~ok.any(axis=1)
+        if complete.any():
+            found.append((game[complete], start[complete], end[complete],
+                          captured[complete], hops[complete],
+                          kinged[complete]))
+        row, k = np.nonzero(ok)
+        game, start, king = game[row], start[row], king[row]
+        captured = captured[row]
+        captured[np.arange(len(row)), mid[row, k]] = True
+        end = land[row, k]
+        hops = hops[row] + 1
+    if not found:
+        empty_rows = np.zeros(0, dtype=int)
+        return (empty_rows, empty_rows, empty_rows,
+                np.zeros((0, tables.squares + 1), dtype=bool), empty_rows,
+                np.zeros(0, dtype=bool))
+    return tuple(np.concatenate(parts) for parts in zip(*found))
+
+def _choose(rng, squares, game, start, length, policy):
+    '''
+    Picks one move per board the way RandomBot or SmartBot would
+
+    Args:
+        rng (np.random.Generator): the random numbers to use
+        squares (int): the number of dark squares
+        game, start, length (np.ndarray): the board, start square and length
+            of each candidate move
+        policy (str): random or smart
+
+    Returns: np.ndarray: the index of the chosen move of each board that has
+        a candidate
+    '''
+    candidates = np.arange(len(game))
+    if policy == "smart":
+        # only the longest moves of each board
+        longest = np.zeros(game.max() + 1, dtype=int)
+        np.maximum.at(longest, game, length)
+        candidates = candidates[length == longest[game]]
+    # group the candidates by board then piece
+    key = game[candidates] * squares + start[candidates]
+    order = np.argsort(key, kind="stable")
+    candidates = candidates[order]
+    pieces, first, count = np.unique(key[order], return_index=True,
+                                     return_counts=True)
+    piece_game = pieces // squares
+    # a random piece of each board: the one with the highest random number
+    order = np.lexsort((rng.random(len(pieces)), piece_game))
+    last = np.append(piece_game[order][1:] != piece_game[order][:-1], True)
+    chosen = order[last]
+    offset = np.zeros(len(chosen), dtype=int)
+    if policy == "random":
+        # then a random move of that piece (SmartBot takes its first one)
+        offset = (rng.random(len(chosen)) * count[chosen]).astype(int)
+    return candidates[first[chosen] + offset]
+
+def _play_batch(tables, rng, size, policies, draw_plies):
+    '''
+    Plays a batch of games to the end, drawing them by repetition or after
+    draw_plies quiet plies, or if draw_plies is None stopping them as ties
+    after MAX_PLIES plies
+
+    Returns:
+        (int, int, int): the number of wins for red, black and ties
+    '''
+    red = np.repeat(tables.red[None, :], size, axis=0)
+    black = np.repeat(tables.black[None, :], size, axis=0)
+    kings = np.zeros_like(red)
+    # the plies since the last capture or promotion of each board, and the
+    # hashes of its positions since then: positions from before can't come
+    # back, as pieces can't be uncaptured or unkinged
+    quiet = np.zeros(size, dtype=int)
+    if draw_plies is not None:
+        history = np.zeros((size, draw_plies + 1), dtype=np.uint64)
+        history[:, 0] = _hash(tables, red, black, kings)
+        # the position of a column has the same side to move as the current
+        # position when its distance to quiet is even
+        columns = np.arange(draw_plies + 1)
+    red_wins = black_wins = 0
+    ply = 0
+    while len(red):
+        color = "red" if ply % 2 == 0 else "black"
+        own, opp = (red, black) if color == "red" else (black, red)
+        policy = policies[ply % 2]
+
+        jumps = _jumps(tables, own, opp, kings, color)
+        game, start, end = _simple_moves(tables, own, opp, kings, color)
+        # forced capture: boards with a jump only take jumps
+        jumped = np.zeros(len(own), dtype=bool)
+        jumped[jumps[0]] = True
+        keep = ~jumped[game]
+        game, start, end = game[keep], start[keep], end[keep]
+        # captures and promotions reset the draw counter
+        progress = jumped.copy()
+        if len(game):
+            chosen = _choose(rng, tables.squares, game, start,
+                             np.ones(len(game), dtype=int), policy)
+            game, start, end = game[chosen], start[chosen], end[chosen]
+            kinged = tables.crown[color][end] & ~kings[game, start]
+            progress[game] = kinged
+            _apply(own, opp, kings, game, start, end, kinged, None)
+        game, start, end, captured, hops, kinged = jumps
+        if len(game):
+            chosen = _choose(rng, tables.squares, game, start, hops, policy)
+            _apply(own, opp, kings, game[chosen], start[chosen], end[chosen],
+                   kinged[chosen], captured[chosen][:, :-1])
+        ply += 1
+        if draw_plies is None and ply > MAX_PLIES:
+            # like bot.play_game(), the games still going are ties
+            break
+
+        red_can = can_move(tables, red, black, kings, "red")
+        black_can = can_move(tables, black, red, kings, "black")
+        red_wins += int(np.count_nonzero(red_can & ~black_can))
+        black_wins += int(np.count_nonzero(black_can & ~red_can))
+        going = red_can & black_can
+
+        if draw_plies is not None:
+            quiet = np.where(progress, 0, quiet + 1)
+            key = _hash(tables, red, black, kings)
+            history[np.arange(len(red)), quiet] = key
+            repeats = (history == key[:, None]) & \
+                (columns <= quiet[:, None]) & \
+                ((quiet[:, None] - columns) % 2 == 0)
+            # the games drawn end here too
+            going &= (quiet < draw_plies) & (repeats.sum(axis=1) < 3)
+
+        # only the games still going are played on
+        if not going.all():
+            red, black, kings = red[going], black[going], kings[going]
+            if draw_plies is not None:
+                quiet, history = quiet[going], history[going]
+    return red_wins, black_wins, size - red_wins - black_wins
+
+def _apply(own, opp, kings, game, start, end, kinged, captured):
+    '''
+    Plays one chosen move on each of the given boards, in place
+    '''
+    king = kings[game, start] | kinged
+    own[game, start] = False
+    kings[game, start] = False
+    own[game, end] = True
+    kings[game, end] = king
+    if captured is not None:
+        opp[game] &= ~captured
+        kings[game] &= ~captured
+
+def simulate(n, players, rows=3, batch_size=4096, seed=None,
+             draw_plies=DRAW_PLIES):
+    """
+    Simulates multiple games between two bots, in batches
+
+    Args:
+        n (int): The number of matches to play
+        players (list[str]): the types of the players, random or smart
+        rows (int): the number of rows of pieces for each player
+        batch_size (int): the number of games played at once
+        seed (int): the seed of the random numbers, drawn from the random
+                    module if not given
+        draw_plies (int): a game is drawn after this many plies without a
+                          capture or a promotion, or on the third
+                          repetition of a position; see bot.play_game()
+                          for None
+
+    Raises:
+        ValueError if a player type is not random or smart
+
+    Returns:
+        wins(int, int, int): number of wins for player1, player2 and ties
+    """
+    policies = [player.lower() for player in players]
+    if any(policy not in POLICIES for policy in policies):
+        raise ValueError
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+    tables = get_tables(rows)
+    player1_wins, player2_wins, ties = 0, 0, 0
+    for first in range(0, n, batch_size):
+        wins1, wins2, tied = _play_batch(tables, rng,
+                                         min(batch_size, n - first), policies,
+                                         draw_plies)
+        player1_wins += wins1
+        player2_wins += wins2
+        ties += tied
+    return player1_wins, player2_wins, ties
+
+
+@click.command(name="checker-batch")
+@click.option('-n', '--num-games',  type=click.INT, default=10000)
+@click.option('--player1',
+              type=click.Choice(POLICIES, case_sensitive=False),
+              default="random")
+@click.option('--player2',
+              type=click.Choice(POLICIES, case_sensitive=False),
+              default="smart")
+@click.option('--rows', type=click.IntRange(1), default=3,
+              help="Rows of pieces per player, as in CheckerBoard(n).")
+@click.option('--batch-size', type=click.IntRange(1), default=4096,
+              show_default=True, help="Games played at once.")
+@click.option('--seed', type=click.INT, default=None)
+@click.option('--draw-plies', type=click.IntRange(1), default=DRAW_PLIES,
+              help="Plies without a capture or a promotion that draw a game "
+                   f"[default: no limit, games over {MAX_PLIES} plies are "
+                   "ties].")
+def cmd(num_games, player1, player2, rows, batch_size, seed, draw_plies):
+    if seed is None:
+        seed = random.getrandbits(64)
+    start = time.perf_counter()
+    bot1, bot2, ties = simulate(num_games, [player1, player2], rows,
+                                batch_size, seed, draw_plies)
+    elapsed = time.perf_counter() - start
+
+    print(f'Bot 1 ({player1}) wins: {100 * bot1 / num_games:.2f}%')
+    print(f'Bot 2 ({player2}) wins: {100 * bot2 / num_games:.2f}%')
+    print(f'Ties: {100 * ties / num_games:.2f}%')
+    print(f'{num_games} games in {elapsed:.2f}s, '
+          f'{num_games / max(elapsed, 1e-9):,.0f} games/s')
+    print(f'Seed: {seed}')
+
+if __name__ == "__main__":
+    cmd()
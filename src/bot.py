@@ -4,15 +4,39 @@ Bots for Checker
 Acknowledgement:
 The strategy adopted by SmartBot was inspired by TA Joshua during the meeting.
 '''
+import atexit
+import csv
+import itertools
+import json
+import math
 import random
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 sys.path.append("./logic")
 import side
 import board as BOARD
 from board import PieceColor
+from archive import GameWriter
+from elo import SPRT, elo_interval
+from engines import ENGINES, BoardPool, new_board
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
 
 import click
 
+def _status(board):
+    '''
+    Returns board.game_ended() under the draw rules of the games played here,
+    which are only on for boards with a draw_plies limit: on other boards, a
+    position the board draws by repetition goes on (CONTINUE)
+    '''
+    status = board.game_ended()
+    # a board draws by repetition only when the player to move can move
+    if status == "DRAW" and board.get_draw_plies() is None and \
+            board.legal_moves(board.get_turn()):
+        return "CONTINUE"
+    return status
+
 class RandomBot:
     '''
     Simple Bot that only moves at random
@@ -31,6 +55,15 @@ class RandomBot:
             self.player = PieceColor.RED.value
         elif color == 'BLACK':
             self.player = PieceColor.BLACK.value
+
+    def rebind(self, board):
+        '''
+        Moves the bot to another board, such as one drawn from a BoardPool
+
+        Args:
+            board (CheckerBoard): the board the bot will be playing on
+        '''
+        self.board = board
     
     def suggest_move(self):
         '''
@@ -40,13 +73,14 @@ class RandomBot:
             initial_loc, chosen_loc (tuple[int]): initial location and chosen
                                                   location
         '''
-        possible_pieces = list(self.board.possible_pieces(self.player))
+        legal_moves = self.board.legal_moves(self.player)
         # randomly select a moveable piece
+        possible_pieces = list(dict.fromkeys(loc for loc, _ in legal_moves))
         selected_piece = random.choice(possible_pieces)
 
-        possible_moves = self.board.possible_moves(selected_piece)
         # randomly select a possible move from the selected piece
-        selected_move = random.choice(possible_moves)
+        selected_move = random.choice([path for loc, path in legal_moves
+                                       if loc == selected_piece])
         return selected_piece, selected_move
 
     def __str__(self):
@@ -82,6 +116,15 @@ class SmartBot:
             self.player = PieceColor.RED.value
         elif color == 'BLACK':
             self.player = PieceColor.BLACK.value
+
+    def rebind(self, board):
+        '''
+        Moves the bot to another board, such as one drawn from a BoardPool
+
+        Args:
+            board (CheckerBoard): the board the bot will be playing on
+        '''
+        self.board = board
     
     def suggest_move(self):
         '''
@@ -92,24 +135,15 @@ class SmartBot:
                                                   location
         '''
 
-        possible_pieces = list(self.board.possible_pieces(self.player))
-        # shuffle all pieces and initialize best_piece to be the first one
-        # this is because the best_piece will only get updated to a jump later
-        # if there's one
-        # if there's no better move, the next best_piece is always randomly
-        # selected, which is consistent with the SmartBot's strategy
-        random.shuffle(possible_pieces)
-        best_piece = possible_pieces[0]
-        best_move = self.board.possible_moves(best_piece)
-        best_dist = -1
-
-        for piece in possible_pieces:
-            moves = self.board.possible_moves(piece)
-            for move in moves:
-                if len(move) > best_dist:
-                    best_piece = piece
-                    best_move = move
-                    best_dist = len(move)
+        legal_moves = self.board.legal_moves(self.player)
+        best_dist = max(len(path) for _, path in legal_moves)
+        # pick a random piece among those that can travel the longest
+        # distance, then its first move of that distance
+        best_pieces = list(dict.fromkeys(loc for loc, path in legal_moves
+                                         if len(path) == best_dist))
+        best_piece = random.choice(best_pieces)
+        best_move = next(path for loc, path in legal_moves
+                         if loc == best_piece and len(path) == best_dist)
 
         return best_piece, best_move
 
@@ -123,85 +157,1145 @@ class SmartBot:
         return "smart"
 
 
+class AlphaBetaBot:
+    '''
+    Bot that looks several moves ahead with an alpha-beta search, playing the
+    moves on the board itself and taking them back.
+        - Positions at the end of the search are scored by material (kings
+          are worth more than men) and by how far the men have advanced
+          towards the row where they turn king
+        - Captures are searched first, and a search never stops in the middle
+          of an exchange of pieces
+        - Moves with the same score are picked at random
+        - The search deepens one ply at a time until it reaches its depth or
+          runs out of its time or node budget, and plays the best move of the
+          deepest search it finished
+        - Results are kept in a transposition table, so that positions
+          reached again are not searched twice and their best move is tried
+          first
+    '''
+    DEFAULT_DEPTH = 4
+    # the depth limit when only a budget is given
+    MAX_DEPTH = 64
+    # the number of positions between two looks at the clock
+    CHECK_EVERY = 64
+    WIN_SCORE = 100000
+    MAN_VALUE = 100
+    KING_VALUE = 160
+    ADVANCE_VALUE = 4
+    # scores beyond this are wins or losses, counted in plies from the root
+    WON_SCORE = WIN_SCORE - 1000
+
+    def __init__(self, board, color, depth=None, time_budget_ms=None,
+                 node_budget=None,
+                 tt_entries=TranspositionTable.DEFAULT_ENTRIES):
+        '''
+        Constructor
+
+        Args:
+            board (CheckerBoard): the board the bot will be playing on
+            color (str): Bot's color, either RED or BLACK
+            depth (int): the most plies to look ahead; DEFAULT_DEPTH if there
+                         is no budget, MAX_DEPTH otherwise
+            time_budget_ms (int): the time a move may take, in milliseconds
+            node_budget (int): the number of positions a move may look at
+            tt_entries (int): the size of the transposition table, 0 for none
+        '''
+        self.board = board
+        if color == 'RED':
+            self.player = PieceColor.RED.value
+            self.opponent = PieceColor.BLACK.value
+        elif color == 'BLACK':
+            self.player = PieceColor.BLACK.value
+            self.opponent = PieceColor.RED.value
+        if depth is None:
+            no_budget = time_budget_ms is None and node_budget is None
+            depth = self.DEFAULT_DEPTH if no_budget else self.MAX_DEPTH
+        self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        # kept from move to move, as its results stay valid
+        self.table = TranspositionTable(tt_entries) if tt_entries else None
+        # the number of positions looked at by the last suggest_move(), the
+        # depth of the deepest search it finished, and whether the move was
+        # forced (the only legal move, played without a search)
+        self.nodes = 0
+        self.depth_reached = 0
+        self.forced = False
+        self.__deadline = None
+        self.__max_nodes = None
+        self.__stopped = False
+
+    def rebind(self, board):
+        '''
+        Moves the bot to another board, such as one drawn from a BoardPool,
+        for a new game. The transposition table is emptied, so that the
+        moves of a game do not depend on the games played before it.
+
+        Args:
+            board (CheckerBoard): the board the bot will be playing on
+        '''
+        self.board = board
+        if self.table is not None:
+            self.table.clear()
+
+    def suggest_move(self):
+        '''
+        Suggests the move with the best score found by the deepest search
+        finished within the budget. A move is suggested even if the budget
+        runs out before the first search finishes.
+
+        Returns:
+            initial_loc, chosen_loc (tuple[int]): initial location and chosen
+                                                  location
+        '''
+        self.nodes = 0
+        self.depth_reached = 0
+        self.__stopped = False
+        self.__deadline = None
+        if self.time_budget_ms is not None:
+            self.__deadline = time.perf_counter() + self.time_budget_ms / 1000
+        self.__max_nodes = self.node_budget
+
+        legal_moves = list(self.board.legal_moves(self.player))
+        # shuffle before the (stable) ordering so that ties go to a random move
+        random.shuffle(legal_moves)
+        legal_moves.sort(key=self.__order)
+        self.forced = len(legal_moves) == 1
+        if self.forced:
+            return legal_moves[0]
+
+        best_move = legal_moves[0]
+        for depth in range(1, self.depth + 1):
+            move, score = self.__search_root(legal_moves, depth)
+            if self.__stopped:
+                break
+            best_move = move
+            self.depth_reached = depth
+            if abs(score) >= self.WON_SCORE:
+                # the game is decided within the search, deeper won't change it
+                break
+            # the next search starts with the best move found so far
+            legal_moves.remove(best_move)
+            legal_moves.insert(0, best_move)
+        return best_move
+
+    def __search_root(self, legal_moves, depth):
+        '''
+        Helper function for suggest_move(), searches each move at the root
+
+        Returns:
+            (tuple(int, int), list[tuple(int, int)]), int: the best move and
+                its score
+        '''
+        best_move, alpha = legal_moves[0], -self.WIN_SCORE - 1
+        for loc, path in legal_moves:
+            token = self.board.make_move(loc, path)
+            score = -self.__search(self.opponent, depth - 1, 1,
+                                   -self.WIN_SCORE - 1, -alpha)
+            self.board.unmake_move(token)
+            if self.__stopped:
+                break
+            if score > alpha:
+                best_move, alpha = (loc, path), score
+        return best_move, alpha
+
+    def evaluate(self, player):
+        '''
+        Scores the position on the board from the point of view of a player
+
+        Args:
+            player (PieceColor.color.value): the player to score for
+
+        Returns:
+            int: the score, higher is better for player
+        '''
+        other = PieceColor.BLACK.value if player == PieceColor.RED.value \
+            else PieceColor.RED.value
+        return self.__material(player) - self.__material(other)
+
+    def __material(self, player):
+        '''
+        Helper function for evaluate(), scores the pieces of one player
+        '''
+        pieces = self.board.get_player_piece(player)
+        kings = self.board.get_player_kings(player)
+        # red men move down the board and black men move up
+        advance = sum(row for row, _ in pieces) - sum(row for row, _ in kings)
+        if player == PieceColor.BLACK.value:
+            last_row = self.board.get_board_size()[0] - 1
+            advance = last_row * (len(pieces) - len(kings)) - advance
+        return self.MAN_VALUE * len(pieces) + \
+            (self.KING_VALUE - self.MAN_VALUE) * len(kings) + \
+            self.ADVANCE_VALUE * advance
+
+    def __order(self, move):
+        '''
+        Helper function for ordering the moves, longest captures first
+        '''
+        loc, path = move
+        if abs(path[0][0] - loc[0]) == 2:
+            return -len(path) - 1
+        return 0
+
+    def __search(self, player, depth, ply, alpha, beta):
+        '''
+        Helper function for suggest_move(), scores the position for the
+        player to move with a negamax alpha-beta search
+
+        Args:
+            player (PieceColor.color.value): the player to move
+            depth (int): the number of plies left to look ahead
+            ply (int): the number of plies played since the root
+            alpha, beta (int): the window of scores still worth searching
+
+        Returns:
+            int: the score of the position for player
+        '''
+        self.nodes += 1
+        if self.nodes % self.CHECK_EVERY == 0 or \
+                self.nodes == self.__max_nodes:
+            self.__check_budget()
+        if self.__stopped:
+            return 0
+        status = _status(self.board)
+        if status != "CONTINUE":
+            if status == "DRAW":
+                return 0
+            # quicker wins and slower losses score better
+            won = status.startswith(PieceColor(player).name)
+            return self.WIN_SCORE - ply if won else ply - self.WIN_SCORE
+
+        legal_moves = self.board.legal_moves(player)
+        loc, path = legal_moves[0]
+        if depth <= 0:
+            # keep going while captures are forced, so that the score is not
+            # taken halfway through an exchange
+            if abs(path[0][0] - loc[0]) != 2:
+                return self.evaluate(player)
+            depth = 0
+
+        # moves are tracked by their index in legal_moves(), which is the
+        # same every time a position is reached
+        order = sorted(range(len(legal_moves)),
+                       key=[self.__order(move) for move in legal_moves]
+                       .__getitem__)
+        table = self.table
+        if table is not None:
+            key = self.board.get_hash()
+            entry = table.probe(key)
+            if entry is not None:
+                stored_depth, bound, score, best = entry
+                score = self.__from_table(score, ply)
+                if stored_depth >= depth and (bound == EXACT or
+                        (bound == LOWER and score >= beta) or
+                        (bound == UPPER and score <= alpha)):
+                    return score
+                if 0 <= best < len(order):
+                    order.remove(best)
+                    order.insert(0, best)
+
+        other = PieceColor.BLACK.value if player == PieceColor.RED.value \
+            else PieceColor.RED.value
+        start_alpha, best = alpha, -1
+        for index in order:
+            loc, path = legal_moves[index]
+            token = self.board.make_move(loc, path)
+            score = -self.__search(other, depth - 1, ply + 1, -beta, -alpha)
+            self.board.unmake_move(token)
+            if self.__stopped:
+                return 0
+            if score >= beta:
+                if table is not None:
+                    table.store(key, depth, LOWER,
+                                self.__to_table(score, ply), index)
+                return score
+            if score > alpha:
+                alpha, best = score, index
+        if table is not None:
+            table.store(key, depth, EXACT if alpha > start_alpha else UPPER,
+                        self.__to_table(alpha, ply), best)
+        return alpha
+
+    def __to_table(self, score, ply):
+        '''
+        Helper function for __search(), counts the plies of a win or a loss
+        from the position stored rather than from the root
+        '''
+        if score >= self.WON_SCORE:
+            return score + ply
+        if score <= -self.WON_SCORE:
+            return score - ply
+        return score
+
+    def __from_table(self, score, ply):
+        '''
+        Helper function for __search(), the reverse of __to_table()
+        '''
+        if score >= self.WON_SCORE:
+            return score - ply
+        if score <= -self.WON_SCORE:
+            return score + ply
+        return score
+
+    def __check_budget(self):
+        '''
+        Helper function for __search(), stops the search once the time or the
+        positions it may use are spent
+        '''
+        if self.__max_nodes is not None and self.nodes >= self.__max_nodes:
+            self.__stopped = True
+        elif self.__deadline is not None and \
+                time.perf_counter() >= self.__deadline:
+            self.__stopped = True
+
+    def __str__(self):
+        '''
+        Returns a string representation of AlphaBetaBot
+
+        Returns:
+            type(str): type of AlphaBetaBot
+        '''
+        return "alphabeta"
+
+
+class MCTSBot:
+    '''
+    Bot that plays many quick games out from the current position and picks
+    the move that did best (Monte Carlo tree search).
+        - Each playout walks down a tree of the moves tried so far, picking
+          the move with the best UCT score (its share of wins plus a bonus
+          for moves tried less often), adds one new move to the tree and
+          plays the rest of the game with RandomBot or SmartBot moves
+        - Playouts are run on clones of the board, so the board itself is
+          never touched
+        - With more than one worker, each worker process grows its own tree
+          and their counts are added up (root parallelism)
+        - The move played is the one tried most often
+    '''
+    DEFAULT_PLAYOUTS = 400
+    EXPLORATION = 1.4
+    # playouts longer than this are counted as ties, for boards without a
+    # draw_plies limit
+    MAX_PLAYOUT_PLIES = 250
+    ROLLOUTS = {"random": RandomBot, "smart": SmartBot}
+
+    def __init__(self, board, color, playouts=None, rollout="random",
+                 workers=1, time_budget_ms=None, exploration=EXPLORATION):
+        '''
+        Constructor
+
+        Args:
+            board (CheckerBoard): the board the bot will be playing on
+            color (str): Bot's color, either RED or BLACK
+            playouts (int): the most games to play out per move;
+                            DEFAULT_PLAYOUTS if there is no time budget
+            rollout (str): the bot playing the games out, random or smart
+            workers (int): the number of processes to play out with
+            time_budget_ms (int): the time a move may take, in milliseconds
+            exploration (float): the weight of the UCT bonus for moves tried
+                                 less often
+
+        Raises:
+            ValueError if rollout is not one of ROLLOUTS
+        '''
+        self.board = board
+        if color == 'RED':
+            self.player = PieceColor.RED.value
+        elif color == 'BLACK':
+            self.player = PieceColor.BLACK.value
+        if rollout not in self.ROLLOUTS:
+            raise ValueError
+        if playouts is None and time_budget_ms is None:
+            playouts = self.DEFAULT_PLAYOUTS
+        self.playouts = playouts
+        self.rollout = rollout
+        self.workers = workers
+        self.time_budget_ms = time_budget_ms
+        self.exploration = exploration
+        # the number of games played out by the last suggest_move(), and
+        # whether the move was forced (played without a search)
+        self.nodes = 0
+        self.forced = False
+
+    def rebind(self, board):
+        '''
+        Moves the bot to another board, such as one drawn from a BoardPool
+
+        Args:
+            board (CheckerBoard): the board the bot will be playing on
+        '''
+        self.board = board
+
+    def suggest_move(self):
+        '''
+        Suggests the move tried most often by the search
+
+        Returns:
+            initial_loc, chosen_loc (tuple[int]): initial location and chosen
+                                                  location
+        '''
+        self.nodes = 0
+        legal_moves = self.board.legal_moves(self.player)
+        self.forced = len(legal_moves) == 1
+        if self.forced:
+            return legal_moves[0]
+        deadline = None
+        if self.time_budget_ms is not None:
+            deadline = time.time() + self.time_budget_ms / 1000
+
+        if self.workers == 1:
+            results = [_grow_tree(self.board, self.playouts, self.rollout,
+                                 self.exploration, deadline)]
+        else:
+            # workers rebuild the position from its squares (without the
+            # positions played before it), and play out with their own
+            # random numbers
+            size = self.board.get_board_size()[0]
+            position = (type(self.board), (size - 2) // 2,
+                        self.board.return_board(), self.board.get_turn(),
+                        self.board.get_draw_plies())
+            shares = [None] * self.workers
+            if self.playouts is not None:
+                shares = [self.playouts // self.workers +
+                          (i < self.playouts % self.workers)
+                          for i in range(self.workers)]
+            pool = _get_pool(self.workers)
+            results = list(pool.map(_grow_tree_worker,
+                [(position, share, self.rollout, self.exploration, deadline,
+                  random.getrandbits(64)) for share in shares]))
+
+        totals = {}
+        for result in results:
+            for move, visits in result.items():
+                totals[move] = totals.get(move, 0) + visits
+                self.nodes += visits
+        loc, path = max(totals, key=totals.get)
+        return loc, list(path)
+
+    def __str__(self):
+        '''
+        Returns a string representation of MCTSBot
+
+        Returns:
+            type(str): type of MCTSBot
+        '''
+        return "mcts"
+
+
+class _Node:
+    '''
+    A move in the tree of MCTSBot, with the results of the playouts that
+    went through it
+    '''
+    __slots__ = ("move", "parent", "player", "children", "untried", "visits",
+                 "wins")
+
+    def __init__(self, move, parent, player, board):
+        '''
+        Constructor
+
+        Args:
+            move (tuple): the (loc, path) played to get here, None at the root
+            parent (_Node): the node the move was played from
+            player (PieceColor.color.value): the player who played the move
+            board (CheckerBoard): the position after the move
+        '''
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        self.untried = []
+        if _status(board) == "CONTINUE":
+            self.untried = list(board.legal_moves(board.get_turn()))
+            random.shuffle(self.untried)
+        self.visits = 0
+        # ties count as half a win
+        self.wins = 0.0
+
+def _grow_tree(board, playouts, rollout, exploration, deadline):
+    '''
+    Runs the playouts of MCTSBot on clones of a board
+
+    Args:
+        board (CheckerBoard): the position to search, left untouched
+        playouts (int): the number of games to play out, or None to play
+                        until the deadline
+        rollout (str): the bot playing the games out, one of MCTSBot.ROLLOUTS
+        exploration (float): the weight of the UCT bonus
+        deadline (float): the time.time() to stop at, or None
+
+    Returns:
+        dict{tuple : int}: the number of playouts through each move at the
+            root, keyed by (loc, tuple(path))
+    '''
+    turn = board.get_turn()
+    other = PieceColor.BLACK.value if turn == PieceColor.RED.value \
+        else PieceColor.RED.value
+    root = _Node(None, None, other, board)
+    bot = MCTSBot.ROLLOUTS[rollout]
+    players = {PieceColor.RED.value: bot(board, "RED"),
+               PieceColor.BLACK.value: bot(board, "BLACK")}
+    done = 0
+    while playouts is None or done < playouts:
+        # always play at least one game out, so there is a move to suggest
+        if deadline is not None and done and time.time() >= deadline:
+            break
+        done += 1
+        clone = board.clone()
+
+        # go down the tree as long as every move of the node has been tried
+        node = root
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.wins /
+                child.visits + exploration * math.sqrt(log_visits /
+                child.visits))
+            clone.apply_move(*node.move)
+
+        # add one new move to the tree
+        if node.untried:
+            move = node.untried.pop()
+            mover = clone.get_turn()
+            clone.apply_move(*move)
+            child = _Node(move, node, mover, clone)
+            node.children.append(child)
+            node = child
+
+        # play the rest of the game out
+        for player in players.values():
+            player.rebind(clone)
+        plies = 0
+        status = _status(clone)
+        while status == "CONTINUE" and plies < MCTSBot.MAX_PLAYOUT_PLIES:
+            clone.apply_move(*players[clone.get_turn()].suggest_move())
+            plies += 1
+            status = _status(clone)
+
+        winner = None
+        if "RED" in status:
+            winner = PieceColor.RED.value
+        elif "BLACK" in status:
+            winner = PieceColor.BLACK.value
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif winner is None:
+                node.wins += 0.5
+            node = node.parent
+    return {(child.move[0], tuple(child.move[1])): child.visits
+            for child in root.children}
+
+def _grow_tree_worker(args):
+    '''
+    Runs _grow_tree() in a worker process, on a position sent as
+    (board class, n, return_board(), turn, draw plies) and with its own
+    random seed
+    '''
+    (board_class, n, rows, turn, draw_plies), playouts, rollout, exploration, \
+        deadline, seed = args
+    random.seed(seed)
+    board = board_class(n, draw_plies)
+    board.load_board(rows, turn)
+    return _grow_tree(board, playouts, rollout, exploration, deadline)
+
+_POOLS = {}
+
+def _get_pool(workers):
+    '''
+    Returns a pool of worker processes, started on first use and shared by
+    every bot asking for the same number of workers
+
+    Args:
+        workers (int): the number of processes
+
+    Returns: ProcessPoolExecutor: the pool
+    '''
+    pool = _POOLS.get(workers)
+    if pool is None:
+        if not _POOLS:
+            atexit.register(_shutdown_pools)
+        pool = _POOLS[workers] = ProcessPoolExecutor(workers)
+    return pool
+
+def _shutdown_pools():
+    '''
+    Shuts down the pools of _get_pool(), at exit
+    '''
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.shutdown(cancel_futures=True)
+
+
 #
 # SIMULATION CODE
 #
-def initialize_players(player_type, board, color):
+PLAYER_TYPES = ("random", "smart", "alphabeta", "mcts")
+
+def initialize_players(player_type, board, color, options=None):
     '''
     A helper function to initialize the bot
 
     Args:
-        player_type (str): the player's type, either random or smart
+        player_type (str): the player's type, one of PLAYER_TYPES
         board (CheckerBoard): the board the player will be playing on
         color (str): Bot's color, either RED or BLACK
+        options (dict): keyword arguments for the bots that take some, by
+                        player type, e.g. {"alphabeta": {"depth": 6}}
     
     Returns:
-        RandomBot or SmartBor: if player_type is random, returns a RandomBot
-                                class object and similar for SmartBot
+        RandomBot, SmartBot, AlphaBetaBot or MCTSBot: if player_type is
+                                random, returns a RandomBot class object and
+                                similar for the other types
     '''
+    options = options or {}
     if "random" in player_type.lower():
         return RandomBot(board, color)
+    if "alphabeta" in player_type.lower():
+        return AlphaBetaBot(board, color, **options.get("alphabeta", {}))
+    if "mcts" in player_type.lower():
+        return MCTSBot(board, color, **options.get("mcts", {}))
     return SmartBot(board, color)
 
-def simulate(n, players):
+def new_stats():
+    '''
+    Returns the empty search stats of one player, see simulate()
+    '''
+    return {"moves": 0, "forced": 0, "depth": 0, "min_depth": None,
+            "max_depth": 0, "nodes": 0, "seconds": 0.0, "tt_probes": 0, "tt_hits": 0,
+            "tt_fill": 0.0}
+
+def merge_stats(counts, more):
+    '''
+    Adds the search stats of one player to those of another, see simulate()
+
+    Args:
+        counts (dict): the stats to add to
+        more (dict): the stats to add
+    '''
+    for key in ("moves", "forced", "depth", "nodes", "seconds", "tt_probes",
+                "tt_hits"):
+        counts[key] += more[key]
+    counts["max_depth"] = max(counts["max_depth"], more["max_depth"])
+    counts["tt_fill"] = max(counts["tt_fill"], more["tt_fill"])
+    if counts["min_depth"] is None or (more["min_depth"] is not None and
+                                       more["min_depth"] < counts["min_depth"]):
+        counts["min_depth"] = more["min_depth"]
+
+def game_seeds(seed, n):
+    '''
+    Derives the seeds of a series of games from a master seed
+
+    Args:
+        seed (int): the master seed
+        n (int): the number of games
+
+    Returns: generator of int: the seed of each game, the same for the same
+        master seed however the games are shared out
+    '''
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield rng.getrandbits(64)
+
+# simulated games have no draw rules by default. Given a number of plies
+# without a capture or a promotion that draws a game (80, 40 moves each, is
+# usual), they are also drawn on the third repetition of a position
+DRAW_PLIES = None
+# a game without the draw rules that goes on for more plies than this is
+# stopped and counted as a tie, as two kings could chase each other around
+# the board for ever
+MAX_PLIES = 250
+
+def play_game(players, engine="object", options=None, seed=None, stats=None,
+              pool=None, draw_plies=DRAW_PLIES, rows=3, keep_moves=False,
+              bots=None):
+    """
+    Plays a game between two bots
+
+    Args:
+        players (list[str]): a list of the types of the players
+        engine (str): the board engine to play on, one of engines.ENGINES
+        options (dict): keyword arguments for the bots by player type, see
+                        initialize_players()
+        seed (int): if given, the random module is seeded with it first, so
+                    the same seed plays the same game
+        stats (list[dict]): if given, the search stats of the players are
+                            added to it, see simulate()
+        pool (BoardPool): if given, the board is drawn from it and given
+                          back at the end
+        draw_plies (int): the game is drawn after this many plies without a
+                          capture or a promotion, or on the third repetition
+                          of a position. With None, neither draws it, and it
+                          is stopped as a tie after MAX_PLIES plies
+        rows (int): the number of rows of pieces for each player
+        keep_moves (bool): whether to add the "moves" played to the record,
+                           a list of (loc, path)
+        bots (dict): if given, the bots of a series of games, keyed by
+                     (player type, color): bots already in it are rebound to
+                     the board of this game, and new ones are added to it
+
+    Returns:
+        dict: the record of the game, with the fields of RECORD_FIELDS but
+              "game": the "seed", the "winner" (RED, BLACK or DRAW), the
+              number of "plies" played, whether the game was stopped at the
+              "cutoff" (drawn by repetition or by draw_plies, or stopped
+              after MAX_PLIES), the "seconds"
+              it took, the "nodes" the bots searched and the seconds each
+              bot took to choose its moves ("red_seconds" and
+              "black_seconds")
+    """
+    start = time.perf_counter()
+    if seed is not None:
+        random.seed(seed)
+    if pool is not None:
+        board = pool.acquire(rows, engine, draw_plies)
+    else:
+        board = new_board(rows, engine, draw_plies)
+    if bots is None:
+        bots = {}
+    for player_type, color in zip(players, ("RED", "BLACK")):
+        if (player_type, color) in bots:
+            bots[player_type, color].rebind(board)
+        else:
+            bots[player_type, color] = initialize_players(player_type, board,
+                                                          color, options)
+    player1 = bots[players[0], "RED"]
+    player2 = bots[players[1], "BLACK"]
+    move_count = 0 
+    nodes = 0
+    # the seconds player1 and player2 took to choose their moves
+    thinking = [0.0, 0.0]
+    moves = [] if keep_moves else None
+
+    current = player1
+
+    while _status(board) == "CONTINUE":
+        move_start = time.perf_counter()
+        start_loc, chosen_loc = current.suggest_move()
+        seconds = time.perf_counter() - move_start
+        thinking[0 if current == player1 else 1] += seconds
+        if stats is not None and isinstance(current, AlphaBetaBot):
+            counts = stats[0 if current == player1 else 1]
+            if current.forced:
+                # a forced move is not searched, so it is left out of the
+                # depth stats, which it would only drag down to 0
+                counts["forced"] += 1
+            else:
+                counts["seconds"] += seconds
+                counts["moves"] += 1
+                counts["nodes"] += current.nodes
+                counts["depth"] += current.depth_reached
+                counts["max_depth"] = max(counts["max_depth"],
+                                          current.depth_reached)
+                if counts["min_depth"] is None or \
+                        current.depth_reached < counts["min_depth"]:
+                    counts["min_depth"] = current.depth_reached
+        # AlphaBetaBot and MCTSBot count the positions and games they search
+        nodes += getattr(current, "nodes", 0)
+        # the move comes from the board's own legal moves, so it can
+        # skip the checks play() makes
+        board.apply_move(start_loc, chosen_loc)
+        if moves is not None:
+            moves.append((start_loc, list(chosen_loc)))
+        move_count += 1
+        if draw_plies is None and move_count > MAX_PLIES:
+            break
+        current = player2 if current == player1 else player1
+
+    if stats is not None:
+        for player, counts in zip((player1, player2), stats):
+            if isinstance(player, AlphaBetaBot) and player.table:
+                counts["tt_probes"] += player.table.probes
+                counts["tt_hits"] += player.table.hits
+                counts["tt_fill"] = max(counts["tt_fill"],
+                                        player.table.fill())
+
+    winner = _status(board)
+    # a game drawn by the draw rules or stopped, typically two kings chasing
+    # each other around the board, rather than one where neither player can
+    # move
+    cutoff = winner == "DRAW" and board.drawn_by_rule()
+    if draw_plies is None and move_count > MAX_PLIES:
+        winner, cutoff = "DRAW", True
+    if pool is not None:
+        pool.release(board)
+    record = {"seed": seed,
+              "winner": winner.split()[0] if "WINS" in winner else "DRAW",
+              "plies": move_count, "cutoff": cutoff,
+              "seconds": round(time.perf_counter() - start, 6),
+              "nodes": nodes, "red_seconds": round(thinking[0], 6),
+              "black_seconds": round(thinking[1], 6)}
+    if moves is not None:
+        record["moves"] = moves
+    return record
+
+def _play_games(args):
+    '''
+    Plays a share of the games of iter_games(), possibly in a worker process
+
+    Args:
+        args (tuple): the players, engine and options of play_game(), the
+                      number of the first game, the seeds of the games,
+                      whether to keep stats and the draw_plies, rows and
+                      keep_moves of play_game()
+
+    Returns:
+        (list[dict], list[dict]): the records of the games and the search
+            stats of the players (None if not kept)
+    '''
+    players, engine, options, first, seeds, keep_stats, draw_plies, rows, \
+        keep_moves = args
+    stats = [new_stats(), new_stats()] if keep_stats else None
+    pool = BoardPool()
+    bots = {}
+    records = []
+    for game, seed in enumerate(seeds, first):
+        record = {"game": game}
+        record.update(play_game(players, engine, options, seed, stats, pool,
+                                draw_plies, rows, keep_moves, bots))
+        records.append(record)
+    return records, stats
+
+def iter_games(n, players, engine="object", options=None, stats=None,
+               workers=1, seed=None, draw_plies=DRAW_PLIES, keep_moves=False):
+    """
+    Plays multiple games between two bots, yielding the record of each game
+    as soon as it is over. Only a few games are kept in memory at a time,
+    however many are played.
+
+    Args:
+        n (int): The number of matches to play
+        players (list[str]): a list of the types of the players
+        engine (str): the board engine to play on, one of engines.ENGINES
+        options (dict): keyword arguments for the bots by player type, see
+                        initialize_players()
+        stats (list[dict]): if given, gets the search stats of the players,
+                            see simulate()
+        workers (int): the number of processes to share the games out to
+        seed (int): the master seed, see simulate()
+        draw_plies (int): see play_game()
+        keep_moves (bool): see play_game()
+
+    Returns:
+        generator of dict: the record of each game (see play_game()) with
+            its "game" number, counting from 0. With more than one worker,
+            records come in the order the games finish
+    """
+    if stats is not None:
+        while len(stats) < 2:
+            stats.append(new_stats())
+    if seed is None:
+        seed = random.getrandbits(64)
+    seeds = game_seeds(seed, n)
+
+    if workers == 1:
+        pool = BoardPool()
+        bots = {}
+        for game, game_seed in enumerate(seeds):
+            record = {"game": game}
+            record.update(play_game(players, engine, options, game_seed,
+                                    stats, pool, draw_plies, 3, keep_moves,
+                                    bots))
+            yield record
+        return
+
+    # a few shares per worker, so that workers finishing early get more, but
+    # small enough for the records to come in steadily
+    size = max(1, min(-(-n // (workers * 4)), 100))
+    pool = ProcessPoolExecutor(workers)
+    try:
+        pending = set()
+        first = 0
+        while True:
+            # only a couple of shares per worker are sent ahead
+            while first < n and len(pending) < 2 * workers:
+                share = list(itertools.islice(seeds, size))
+                pending.add(pool.submit(_play_games, (players, engine,
+                    options, first, share, stats is not None, draw_plies,
+                    3, keep_moves)))
+                first += len(share)
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records, share_stats = future.result()
+                if stats is not None:
+                    for counts, more in zip(stats, share_stats):
+                        merge_stats(counts, more)
+                yield from records
+    finally:
+        # also stops the games not started if the caller stops early
+        pool.shutdown(cancel_futures=True)
+
+def tally(records):
+    '''
+    Counts the results of games
+
+    Args:
+        records (iterable of dict): the records of the games
+
+    Returns:
+        wins(int, int, int): number of wins for player1 (RED), player2
+            (BLACK) and ties
+    '''
+    player1_wins, player2_wins, ties = 0, 0, 0
+    for record in records:
+        if record["winner"] == "RED":
+            player1_wins += 1
+        elif record["winner"] == "BLACK":
+            player2_wins += 1
+        else:
+            ties += 1
+    return player1_wins, player2_wins, ties
+
+def sequential(records, test):
+    '''
+    Feeds game records to a sequential test as they come, from player1's
+    (RED's) side, and stops once the test has reached a conclusion
+
+    Args:
+        records (iterable of dict): the records of the games
+        test (SPRT): the test to feed
+
+    Returns:
+        generator of dict: the records, until the test stops. Closing it
+            doesn't close records: iter_games() should be closed by the
+            caller to stop the games still being played
+    '''
+    for record in records:
+        test.add({"RED": 1, "BLACK": 0}.get(record["winner"], 0.5))
+        yield record
+        if test.status() is not None:
+            return
+
+def simulate(n, players, engine="object", options=None, stats=None,
+             workers=1, seed=None, draw_plies=DRAW_PLIES, archive=None):
     """ 
     Simulates multiple games between two bots
     
     Args:
         n (int): The number of matches to play
         players (list[str]): a list of the types of the players
+        engine (str): the board engine to play on, one of engines.ENGINES
+        options (dict): keyword arguments for the bots by player type, see
+                        initialize_players()
+        stats (list[dict]): if given, stats[0] and stats[1] get the search
+                            stats of player1 and player2 when they are
+                            AlphaBetaBots: the number of "moves" searched (and
+                            of "forced" moves, played without a search), the
+                            total, "min_depth" and "max_depth" of the depths
+                            reached, the total "nodes" and "seconds", and
+                            the "tt_probes" and "tt_hits" of their
+                            transposition table with its largest "tt_fill"
+        workers (int): the number of processes to share the games out to
+        seed (int): the master seed the seed of each game is derived from;
+                    the results only depend on it, not on workers (unless
+                    the bots have a time budget). Drawn from the random
+                    module if not given
+        draw_plies (int): a game is drawn after this many plies without a
+                          capture or a promotion, or on the third repetition
+                          of a position; see play_game() for None
+        archive (GameWriter): if given, every game is written to it
     
     Returns: 
         wins(int, int, int): number of wins for player1, player2 and ties
     """
-    player1_wins, player2_wins, ties = 0, 0, 0
-    for _ in range(n):
-        board = BOARD.CheckerBoard(3)
-        player1 = initialize_players(players[0], board, "RED")
-        player2 = initialize_players(players[1], board, "BLACK")
-        move_count = 0 
-
-        current = player1
-
-        while board.game_ended() == "CONTINUE":
-            start_loc, chosen_loc = current.suggest_move()
-            board.play(start_loc, chosen_loc)
-            move_count += 1
-            if move_count > 250:
-                # When move_count is greater than 250, this is usually the edge
-                # case where both players have only one piece left and it is
-                # usually the king of each player
-                # It cound end up in an infinite loop of game where neither king
-                # could kill the other and ends up moving back and forth
-                # We would end the game and count this as a tie
-                break
-            current = player2 if current == player1 else player1
+    records = iter_games(n, players, engine, options, stats, workers, seed,
+                         draw_plies, archive is not None)
+    if archive is not None:
+        records = archive_games(records, archive)
+    return tally(records)
 
-        winner = board.game_ended()
-        if "RED" in winner:
-            player1_wins += 1
-        elif "BLACK" in winner:
-            player2_wins += 1
+RECORD_FIELDS = ("game", "seed", "winner", "plies", "cutoff", "seconds",
+                 "nodes", "red_seconds", "black_seconds")
+
+def archive_games(records, writer, rows=3):
+    '''
+    Writes the games of records kept with their moves to an archive, and
+    passes the records on without the moves
+
+    Args:
+        records (iterable of dict): the records of the games, see
+                                    play_game()
+        writer (GameWriter): the archive to write to
+        rows (int): the number of rows of pieces for each player the games
+                    were played with
+
+    Returns:
+        generator of dict: the records, each one once its game is written
+    '''
+    for record in records:
+        writer.write_game(rows, record["seed"], record["winner"],
+                          record.pop("moves"))
+        yield record
+
+def write_records(records, file, fmt="jsonl"):
+    '''
+    Writes game records to a file one line at a time, as they come, and
+    passes them on
+
+    Args:
+        records (iterable of dict): the records of the games
+        file (file object): the open text file to write to
+        fmt (str): jsonl for one JSON object per line, or csv for a header
+                   line with RECORD_FIELDS then one line per game
+
+    Returns:
+        generator of dict: the records, each one once it is written
+    '''
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(file, RECORD_FIELDS)
+        writer.writeheader()
+    for record in records:
+        if writer is not None:
+            writer.writerow(record)
         else:
-            ties += 1
-        
-    return player1_wins, player2_wins, ties
+            file.write(json.dumps(record) + "\n")
+        # flushed so that the file can be followed while the games go on
+        file.flush()
+        yield record
 
 
 @click.command(name="checker-bot")
 @click.option('-n', '--num-games',  type=click.INT, default=10000)
 @click.option('--player1',
-              type=click.Choice(['random', 'smart'], case_sensitive=False),
+              type=click.Choice(PLAYER_TYPES, case_sensitive=False),
               default="random")
 @click.option('--player2',
-              type=click.Choice(['random', 'smart'], case_sensitive=False),
+              type=click.Choice(PLAYER_TYPES, case_sensitive=False),
               default="smart")
-def cmd(num_games, player1, player2):
-    bot1, bot2, ties = simulate(num_games, [player1, player2])
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              default="object")
+@click.option('-d', '--depth', type=click.IntRange(1), default=None,
+              help="Most plies alphabeta players look ahead "
+                   f"[default: {AlphaBetaBot.DEFAULT_DEPTH}, or "
+                   f"{AlphaBetaBot.MAX_DEPTH} with a budget].")
+@click.option('--time-budget-ms', type=click.IntRange(1), default=None,
+              help="Time an alphabeta or mcts player may take per move.")
+@click.option('--node-budget', type=click.IntRange(1), default=None,
+              help="Positions an alphabeta player may search per move.")
+@click.option('--tt-entries', type=click.IntRange(0),
+              default=TranspositionTable.DEFAULT_ENTRIES, show_default=True,
+              help="Transposition table entries of an alphabeta player "
+                   "(16 bytes each), 0 for none.")
+@click.option('--playouts', type=click.IntRange(1), default=None,
+              help="Games an mcts player plays out per move "
+                   f"[default: {MCTSBot.DEFAULT_PLAYOUTS} without a budget].")
+@click.option('--rollout',
+              type=click.Choice(list(MCTSBot.ROLLOUTS), case_sensitive=False),
+              default="random", show_default=True,
+              help="Bot an mcts player plays the games out with.")
+@click.option('--rollout-workers', type=click.IntRange(1), default=1,
+              show_default=True,
+              help="Processes an mcts player plays the games out on.")
+@click.option('-w', '--workers', type=click.IntRange(1), default=1,
+              show_default=True,
+              help="Processes to share the games out to.")
+@click.option('--seed', type=click.INT, default=None,
+              help="Master seed of the games; the same seed plays the same "
+                   "games, whatever the number of workers.")
+@click.option('--draw-plies', type=click.IntRange(1), default=DRAW_PLIES,
+              help="Plies without a capture or a promotion that draw a game "
+                   f"[default: no limit, games over {MAX_PLIES} plies are "
+                   "ties].")
+@click.option('--sprt', is_flag=True,
+              help="Stop as soon as a sequential probability ratio test of "
+                   "player1's Elo over player2 decides between --elo0 and "
+                   "--elo1; -n is then the most games played.")
+@click.option('--elo0', type=click.FLOAT, default=0.0, show_default=True,
+              help="Elo difference of the null hypothesis of --sprt.")
+@click.option('--elo1', type=click.FLOAT, default=10.0, show_default=True,
+              help="Elo difference of the alternative hypothesis of --sprt.")
+@click.option('--alpha', type=click.FloatRange(0, 1, min_open=True,
+                                               max_open=True),
+              default=0.05, show_default=True,
+              help="Chance that --sprt accepts elo1 when elo0 is true.")
+@click.option('--beta', type=click.FloatRange(0, 1, min_open=True,
+                                              max_open=True),
+              default=0.05, show_default=True,
+              help="Chance that --sprt accepts elo0 when elo1 is true.")
+@click.option('--archive', type=click.Path(dir_okay=False), default=None,
+              help="Archive file to append the moves of every game to.")
+@click.option('--records', type=click.File('w'), default=None,
+              help="File to write a record of each game to as it ends "
+                   "(- for the terminal).")
+@click.option('--records-format', type=click.Choice(['jsonl', 'csv']),
+              default="jsonl", show_default=True)
+def cmd(num_games, player1, player2, engine, depth, time_budget_ms,
+        node_budget, tt_entries, playouts, rollout, rollout_workers, workers,
+        seed, draw_plies, sprt, elo0, elo1, alpha, beta, archive, records,
+        records_format):
+    options = {
+        "alphabeta": {"depth": depth, "time_budget_ms": time_budget_ms,
+                      "node_budget": node_budget, "tt_entries": tt_entries},
+        "mcts": {"playouts": playouts, "rollout": rollout.lower(),
+                 "workers": rollout_workers,
+                 "time_budget_ms": time_budget_ms}}
+    if seed is None:
+        seed = random.getrandbits(64)
+    test = None
+    if sprt:
+        if elo1 <= elo0:
+            raise click.BadParameter("must be above --elo0",
+                                     param_hint="--elo1")
+        test = SPRT(elo0, elo1, alpha, beta)
+    stats = []
+    played = iter_games(num_games, [player1, player2], engine, options,
+                        stats, workers, seed, draw_plies, archive is not None)
+    games = played
+    writer = None
+    if archive is not None:
+        try:
+            writer = GameWriter(archive)
+        except ValueError:
+            raise click.BadParameter("not an archive file",
+                                     param_hint="--archive")
+        games = archive_games(games, writer)
+    if test is not None:
+        games = sequential(games, test)
+    if records is not None:
+        games = write_records(games, records, records_format)
+    bot1, bot2, ties = tally(games)
+    # stops the games still being played once the test has decided
+    played.close()
+    if writer is not None:
+        writer.close()
+    num_games = bot1 + bot2 + ties
 
     print(f'Bot 1 ({player1}) wins: {100 * bot1 / num_games:.2f}%')
     print(f'Bot 2 ({player2}) wins: {100 * bot2 / num_games:.2f}%')
     print(f'Ties: {100 * ties / num_games:.2f}%')
+    if test is not None:
+        elo, low, high = elo_interval(bot1, ties, bot2)
+        print(f'Bot 1 Elo over bot 2: {elo:+.1f} (95% interval '
+              f'{low:+.1f} to {high:+.1f})')
+        status = test.status()
+        if status == "H1":
+            verdict = (f'accepted elo1 = {elo1:+g} (false positive rate '
+                       f'{100 * alpha:g}%)')
+        elif status == "H0":
+            verdict = (f'accepted elo0 = {elo0:+g} (false negative rate '
+                       f'{100 * beta:g}%)')
+        else:
+            verdict = "inconclusive, out of games"
+        print(f'SPRT after {num_games} games: {verdict}, LLR '
+              f'{test.llr():.2f} in [{test.lower:.2f}, {test.upper:.2f}]')
+    for number, counts in enumerate(stats, 1):
+        if counts["moves"]:
+            print(f'Bot {number} search: depth '
+                  f'{counts["depth"] / counts["moves"]:.1f} on average '
+                  f'({counts["min_depth"]}-{counts["max_depth"]}), '
+                  f'{counts["nodes"] / counts["moves"]:,.0f} nodes and '
+                  f'{1000 * counts["seconds"] / counts["moves"]:.1f} ms '
+                  f'per move, {counts["forced"]} forced moves not searched')
+        if counts["tt_probes"]:
+            print(f'Bot {number} table: '
+                  f'{100 * counts["tt_hits"] / counts["tt_probes"]:.1f}% '
+                  f'hits, up to {100 * counts["tt_fill"]:.1f}% full')
+    print(f'Seed: {seed}')
     return
 
 if __name__ == "__main__":
@@ -0,0 +1,309 @@
+'''
+Self-play datasets: plays games between bots and writes every position they
+go through to NumPy files, for tuning evaluation weights on more positions
+than fit in memory.
+
+A dataset is a directory of chunks, each a set of .npy files holding the
+same number of positions (CHUNK_SIZE, but for the last chunk of a shard):
+
+- planes (uint8, (N, 4, D)): the red men, black men, red kings and black
+  kings on each of the D dark squares, numbered row by row
+- turn (uint8, (N,)): the player to move, 1 for RED and 2 for BLACK
+- outcome (int8, (N,)): the result of the game, 1 if RED won, -1 if BLACK
+  won and 0 for a draw
+- ply (uint16, (N,)): the number of plies played before the position
+
+Each worker process writes its own shard of chunks, and MANIFEST lists the
+chunks of every shard. Running again into the same directory adds shards to
+it. read_chunks() maps the files into memory instead of reading them.
+'''
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+import numpy as np
+
+sys.path.append("./logic")
+from bot import (DRAW_PLIES, MAX_PLIES, PLAYER_TYPES, AlphaBetaBot,
+                 game_seeds, play_game)
+from engines import ENGINES, BoardPool
+from replay import replay
+
+MANIFEST = "manifest.json"
+VERSION = 1
+CHUNK_SIZE = 1 << 16
+FIELDS = {"planes": "uint8", "turn": "uint8", "outcome": "int8",
+          "ply": "uint16"}
+OUTCOMES = {"RED": 1, "BLACK": -1, "DRAW": 0}
+PIECES = "rbRB"
+
+class ChunkWriter:
+    '''
+    Writes the positions of a shard into chunks of .npy files, keeping one
+    chunk in memory at a time
+
+    Public Attributes:
+    chunks (list[dict]): the "name" of each chunk written and the number of
+        "positions" in it
+    '''
+
+    def __init__(self, path, shard, squares, chunk_size=CHUNK_SIZE):
+        '''
+        Constructor
+
+        Args:
+            path (str): the directory of the dataset
+            shard (int): the number of the shard, used in file names
+            squares (int): the number of dark squares of the board
+            chunk_size (int): the number of positions per chunk
+        '''
+        self.__path = path
+        self.__shard = shard
+        self.__size = chunk_size
+        self.__planes = np.zeros((chunk_size, len(PIECES), squares),
+                                 dtype=np.uint8)
+        self.__turn = np.zeros(chunk_size, dtype=np.uint8)
+        self.__outcome = np.zeros(chunk_size, dtype=np.int8)
+        self.__ply = np.zeros(chunk_size, dtype=np.uint16)
+        self.__used = 0
+        self.chunks = []
+
+    def add(self, planes, turn, outcome, ply):
+        '''
+        Adds a position, writing the chunk out once it is full
+
+        Args:
+            planes (np.ndarray): (4, D) the pieces of the position
+            turn (int): the player to move
+            outcome (int): the result of the game, see OUTCOMES
+            ply (int): the number of plies played before the position
+        '''
+        used = self.__used
+        self.__planes[used] = planes
+        self.__turn[used] = turn
+        self.__outcome[used] = outcome
+        self.__ply[used] = ply
+        self.__used += 1
+        if self.__used == self.__size:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes out the positions not written yet, as a chunk
+        '''
+        if not self.__used:
+            return
+        name = f"{self.__shard:04d}-{len(self.chunks):05d}"
+        for field, data in (("planes", self.__planes),
+                            ("turn", self.__turn),
+                            ("outcome", self.__outcome),
+                            ("ply", self.__ply)):
+            np.save(os.path.join(self.__path, f"{name}.{field}.npy"),
+                    data[:self.__used])
+        self.chunks.append({"name": name, "positions": self.__used})
+        self.__used = 0
+
+def _dark_squares(size):
+    '''
+    Returns: list[tuple(int, int)]: the dark squares of a board size, row by
+        row
+    '''
+    return [(i, j) for i in range(size) for j in range(size)
+            if (i + j) % 2 == 1]
+
+def encode(board, squares):
+    '''
+    Returns: np.ndarray: (4, D) the red men, black men, red kings and black
+        kings of a board on its dark squares
+
+    Args:
+        board (CheckerBoard): the board
+        squares (list[tuple(int, int)]): its dark squares, row by row
+    '''
+    rows = board.return_board()
+    letters = np.array([rows[i][j] for i, j in squares])
+    return np.stack([letters == piece for piece in PIECES]).astype(np.uint8)
+
+def _write_shard(args):
+    '''
+    Plays a share of the games of write_dataset() and writes their positions
+    as a shard, possibly in a worker process
+
+    Args:
+        args (tuple): the directory, the number of the shard, the seeds of
+                      the games, the players, engine, options, draw_plies
+                      and rows of bot.play_game() and the chunk size
+
+    Returns:
+        (list[dict], int): the chunks written and the number of games
+    '''
+    path, shard, seeds, players, engine, options, draw_plies, rows, \
+        chunk_size = args
+    size = 2 * rows + 2
+    squares = _dark_squares(size)
+    writer = ChunkWriter(path, shard, len(squares), chunk_size)
+    pool = BoardPool()
+    bots = {}
+    for seed in seeds:
+        record = play_game(players, engine, options, seed, None, pool,
+                           draw_plies, rows, True, bots)
+        outcome = OUTCOMES[record["winner"]]
+        board = pool.acquire(rows, engine)
+        # the moves come from the engine, so they are replayed unchecked
+        for ply, position in replay(record, board, verify=False):
+            writer.add(encode(position, squares), position.get_turn(),
+                       outcome, ply)
+        pool.release(board)
+    writer.flush()
+    return writer.chunks, len(seeds)
+
+def write_dataset(path, n, players, engine="object", options=None,
+                  workers=1, seed=None, draw_plies=DRAW_PLIES, rows=3,
+                  chunk_size=CHUNK_SIZE):
+    '''
+    Plays games between two bots and adds their positions to a dataset,
+    each worker writing its own shard
+
+    Args:
+        path (str): the directory of the dataset, made if it doesn't exist
+        n (int): the number of games to play
+        players (list[str]): the types of the players, see bot.PLAYER_TYPES
+        engine (str): the board engine to play on, one of engines.ENGINES
+        options (dict): keyword arguments for the bots by player type, see
+                        bot.initialize_players()
+        workers (int): the number of processes, and of shards added
+        seed (int): the master seed the seed of each game is derived from,
+                    drawn from the random module if not given
+        draw_plies (int): see bot.play_game()
+        rows (int): the number of rows of pieces for each player
+        chunk_size (int): the number of positions per chunk
+
+    Raises:
+        ValueError if the dataset holds positions of another board size
+
+    Returns:
+        dict: the manifest of the dataset
+    '''
+    os.makedirs(path, exist_ok=True)
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        manifest = read_manifest(path)
+    else:
+        manifest = {"version": VERSION, "rows": rows,
+                    "squares": (2 * rows + 2) ** 2 // 2, "fields": FIELDS,
+                    "planes": ["red men", "black men", "red kings",
+                               "black kings"],
+                    "games": 0, "positions": 0, "shards": 0, "chunks": []}
+    if manifest["rows"] != rows:
+        raise ValueError
+    if seed is None:
+        seed = random.getrandbits(64)
+    seeds = list(game_seeds(seed, n))
+    first = manifest["shards"]
+    shares = [(path, first + number, seeds[number::workers], players, engine,
+               options, draw_plies, rows, chunk_size)
+              for number in range(min(workers, n))]
+    if workers == 1:
+        results = [_write_shard(args) for args in shares]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_write_shard, shares))
+
+    # the manifest is only updated once every shard is written, and replaced
+    # in one go, so it never lists chunks that aren't there
+    for chunks, games in results:
+        manifest["chunks"].extend(chunks)
+        manifest["games"] += games
+        manifest["positions"] += sum(chunk["positions"] for chunk in chunks)
+    manifest["shards"] = first + len(shares)
+    temporary = os.path.join(path, MANIFEST + ".tmp")
+    with open(temporary, "w") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(temporary, os.path.join(path, MANIFEST))
+    return manifest
+
+def read_manifest(path):
+    '''
+    Returns: dict: the manifest of the dataset in a directory, see
+        write_dataset()
+
+    Raises:
+        ValueError if the manifest is of another version
+    '''
+    with open(os.path.join(path, MANIFEST)) as file:
+        manifest = json.load(file)
+    if manifest.get("version") != VERSION:
+        raise ValueError
+    return manifest
+
+def read_chunks(path):
+    '''
+    Reads the chunks of a dataset, mapping their files into memory rather
+    than reading them
+
+    Args:
+        path (str): the directory of the dataset
+
+    Returns:
+        generator of dict{str : np.ndarray}: the arrays of each field of
+            each chunk, see the module docstring
+    '''
+    for chunk in read_manifest(path)["chunks"]:
+        yield {field: np.load(os.path.join(path,
+                                           f"{chunk['name']}.{field}.npy"),
+                              mmap_mode="r")
+               for field in FIELDS}
+
+
+@click.command(name="checker-dataset")
+@click.option('-o', '--output', type=click.Path(file_okay=False),
+              required=True, help="Directory of the dataset to add to.")
+@click.option('-n', '--num-games', type=click.IntRange(1), default=1000,
+              show_default=True)
+@click.option('--player1',
+              type=click.Choice(PLAYER_TYPES, case_sensitive=False),
+              default="smart")
+@click.option('--player2',
+              type=click.Choice(PLAYER_TYPES, case_sensitive=False),
+              default="smart")
+@click.option('--rows', type=click.IntRange(1, 9), default=3,
+              help="Rows of pieces per player, as in CheckerBoard(n).")
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              default="bitboard")
+@click.option('-d', '--depth', type=click.IntRange(1), default=None,
+              help="Most plies alphabeta players look ahead "
+                   f"[default: {AlphaBetaBot.DEFAULT_DEPTH}].")
+@click.option('-w', '--workers', type=click.IntRange(1), default=1,
+              show_default=True,
+              help="Processes to play the games on, each writing a shard.")
+@click.option('--seed', type=click.INT, default=None)
+@click.option('--draw-plies', type=click.IntRange(1), default=DRAW_PLIES,
+              help="Plies without a capture or a promotion that draw a game "
+                   f"[default: no limit, games over {MAX_PLIES} plies are "
+                   "ties].")
+@click.option('--chunk-size', type=click.IntRange(1), default=CHUNK_SIZE,
+              show_default=True, help="Positions per chunk.")
+def cmd(output, num_games, player1, player2, rows, engine, depth, workers,
+        seed, draw_plies, chunk_size):
+    if seed is None:
+        seed = random.getrandbits(64)
+    start = time.perf_counter()
+    try:
+        manifest = write_dataset(output, num_games, [player1, player2],
+                                 engine, {"alphabeta": {"depth": depth}},
+                                 workers, seed, draw_plies, rows, chunk_size)
+    except ValueError:
+        raise click.BadParameter("holds another board size or version",
+                                 param_hint="--output")
+    elapsed = time.perf_counter() - start
+    print(f'{num_games} games in {elapsed:.2f}s; the dataset now has '
+          f'{manifest["games"]} games, {manifest["positions"]} positions in '
+          f'{len(manifest["chunks"])} chunks')
+    print(f'Seed: {seed}')
+
+if __name__ == "__main__":
+    cmd()
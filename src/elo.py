@@ -0,0 +1,147 @@
+'''
+Elo ratings and sequential testing of game results.
+
+Results are always counted from one player's side: a win scores 1, a draw
+1/2 and a loss 0, and an Elo difference d means an expected score of
+1 / (1 + 10 ** (-d / 400)).
+'''
+import math
+
+def expected_score(elo):
+    '''
+    Returns: float: the expected score of a player rated elo points above
+        its opponent
+    '''
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def elo_difference(score):
+    '''
+    Returns: float: the Elo difference giving an expected score, infinite
+        for a score of 0 or 1
+    '''
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+def score_stats(wins, draws, losses):
+    '''
+    Returns: (float, float): the mean score per game and its variance per
+        game
+    '''
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 +
+                losses * score ** 2) / games
+    return score, variance
+
+def elo_interval(wins, draws, losses, z=1.96):
+    '''
+    Estimates an Elo difference from game results
+
+    Args:
+        wins, draws, losses (int): the results, from the player's side
+        z (float): the number of standard deviations on each side of the
+                   estimate, 1.96 for a 95% interval
+
+    Raises:
+        ValueError if there are no games
+
+    Returns:
+        (float, float, float): the Elo difference and the low and high ends
+            of its interval
+    '''
+    games = wins + draws + losses
+    if not games:
+        raise ValueError
+    score, variance = score_stats(wins, draws, losses)
+    margin = z * math.sqrt(variance / games)
+    return (elo_difference(score), elo_difference(score - margin),
+            elo_difference(score + margin))
+
+
+class SPRT:
+    '''
+    A sequential probability ratio test of the Elo difference between two
+    players, fed one game at a time: H0 is that the difference is elo0, H1
+    that it is elo1. The log-likelihood ratio of the results so far uses
+    the normal approximation of the score of a game with wins, draws and
+    losses (the "trinomial" GSPRT), and the test stops as soon as it leaves
+    the bounds set by alpha and beta.
+
+    Public Attributes:
+    elo0, elo1 (float): the Elo differences of H0 and H1
+    alpha (float): the chance of accepting H1 when H0 is true
+    beta (float): the chance of accepting H0 when H1 is true
+    lower, upper (float): the log-likelihood ratios at which H0 and H1 are
+        accepted
+    wins, draws, losses (int): the results so far
+    '''
+
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        '''
+        Constructor
+
+        Raises:
+            ValueError if elo1 is not above elo0, or alpha or beta is not
+                between 0 and 1
+        '''
+        if elo1 <= elo0 or not 0 < alpha < 1 or not 0 < beta < 1:
+            raise ValueError
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, score):
+        '''
+        Counts the result of a game
+
+        Args:
+            score (float): 1 for a win, 0.5 for a draw and 0 for a loss
+        '''
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def games(self):
+        '''
+        Returns: int: the number of games counted
+        '''
+        return self.wins + self.draws + self.losses
+
+    def llr(self):
+        '''
+        Returns: float: the log-likelihood ratio of H1 over H0 given the
+            results so far, 0 until the results vary
+        '''
+        if not self.games():
+            return 0.0
+        score, variance = score_stats(self.wins, self.draws, self.losses)
+        if variance == 0:
+            return 0.0
+        score0 = expected_score(self.elo0)
+        score1 = expected_score(self.elo1)
+        return self.games() * (score1 - score0) * \
+            (2 * score - score0 - score1) / (2 * variance)
+
+    def status(self):
+        '''
+        Returns: str: H0 or H1 once the test has accepted it, None while it
+            goes on
+        '''
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
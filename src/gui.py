@@ -1,8 +1,9 @@
 import pygame,sys,click
 from enum import Enum
 PieceColor = Enum("PieceColor", ["RED", "BLACK"])
-from logic.board import CheckerBoard
+from logic.engines import ENGINES, new_board
 from mock_game import CheckerBoardStub
+from archive import GameWriter
 WIDTH = 800
 HEIGHT = 800
 RED = (255,0,0)
@@ -89,7 +90,7 @@ def splitloc(movable):
         list1.append(move[0])
     return list1
 
-def select(screen, sizn, row, col,coln, board,current,selected):
+def select(screen, sizn, row, col,coln, board,current,selected,jumps=None):
     """
         function to let users select the piece at given position or execute the movement 
         screen: Pygame surface to draw the board on
@@ -101,55 +102,58 @@ def select(screen, sizn, row, col,coln, board,current,selected):
         coln: number of rows and columns
         current: current player color
         selected: track whether a piece have already been selected 
+        jumps: jump tree of the selected piece if it has to jump, so a
+            multi-jump is played one hop at a time without recomputing it
+    Returns: (selected, whether the turn is over, remaining jump tree)
     """
 
     cur_pos=(row,col)
     if selected == [-1,-1]:
-        list1 = board.possible_pieces(current.color.value)
+        legal_moves = board.legal_moves(current.color.value)
+        list1 = {loc for loc, _ in legal_moves}
         if cur_pos in list1:
             selected1 = [row,col]
             selected2 = (row,col)
-            movable = board.possible_moves(selected2)
+            movable = [path for loc, path in legal_moves if loc == selected2]
+            if abs(movable[0][0][0] - row) == 2:
+                jumps = board.jump_tree(selected2)
             draw_board(board,screen,sizn,coln, movable)
-            return (selected1,False)
+            return (selected1,False,jumps)
         else:
             draw_board(board,screen,sizn,coln)
-            return([-1,-1],False)
+            return([-1,-1],False,None)
     else:
         row1 = selected[0]
         col1 = selected[1]
         selected1=(row1,col1)
         cur_pos1=[row,col]
-        piece1 = board.get_piece(selected1)
-        flag = piece1.is_king
-        movable = board.possible_moves(selected1)
-        movable = splitloc(movable)
-        if cur_pos in movable:
-            if abs(selected[0]-cur_pos[0])==1:
+        if jumps is None:
+            movable = [path for loc, path in
+                       board.legal_moves(current.color.value)
+                       if loc == selected1]
+            if cur_pos in splitloc(movable):
                 board.move(selected1,cur_pos)
-            else:
-                board.one_jump(selected1,cur_pos)
-            movable = board.possible_jumps(cur_pos)   
-            movable1 = splitloc(movable)
-            movable2 = [movable1]
-            if not flag and (cur_pos[0]==0 or cur_pos[0]==sizn-1):
                 draw_board(board,screen,sizn,coln)
-                return ([-1,-1],True)
-            elif  abs(selected[0]-cur_pos[0])==2 and movable:
-                '''print('Case',cur_pos1)'''
-                draw_board(board,screen,sizn,coln, movable2)
-                return(cur_pos1,False)
-            else:
-                draw_board(board,screen,sizn,coln)
-                return ([-1,-1],True)
-        return (selected,False)
+                return ([-1,-1],True,None)
+        elif cur_pos in jumps:
+            # the hops that may follow are already in the tree, which also
+            # tells the board when the turn is over
+            jumps = jumps[cur_pos]
+            board.one_jump(selected1,cur_pos,not jumps)
+            if jumps:
+                draw_board(board,screen,sizn,coln, [[loc] for loc in jumps])
+                return(cur_pos1,False,jumps)
+            draw_board(board,screen,sizn,coln)
+            return ([-1,-1],True,None)
+        return (selected,False,jumps)
     
-def play_checker(board,players):
+def play_checker(board,players,writer=None):
     """ Plays a game of Checker on a Pygame window
     Args:
         board: The board to play on
         players: A dictionary mapping piece colors to
           GUIPlayer objects.
+        writer: if given, a GameWriter the game is added to when it is over
     Returns: None
     """
     pygame.init()
@@ -161,6 +165,13 @@ def play_checker(board,players):
     current = players[PieceColor.RED]
     draw_board(board,screen,sizn,coln)
     selected = [-1,-1]
+    jumps = None
+    # the piece moved this turn and the squares it went through, as moves
+    # are played one click (and one hop) at a time
+    origin = None
+    path = []
+    if writer is not None:
+        writer.begin_game((rown-2)//2)
     while board.game_ended()=='CONTINUE':
         clock.tick(24)
         for event in pygame.event.get():
@@ -172,15 +183,26 @@ def play_checker(board,players):
                 y_pos = pygame.mouse.get_pos()[1]
                 rowp = y_pos//sizn
                 colp = x_pos//sizn
-                temp = select(screen,sizn,rowp,colp,coln,board,current,selected)   
+                temp = select(screen,sizn,rowp,colp,coln,board,current,selected,
+                              jumps)
+                if selected == [-1,-1]:
+                    origin = tuple(temp[0])
+                elif temp[1] or temp[0] != selected:
+                    path.append((rowp,colp))
                 selected = temp[0]
                 flag = temp[1]
+                jumps = temp[2]
                 if flag:
+                    if writer is not None:
+                        writer.add_move(origin, path)
+                    path = []
                     if current.color == PieceColor.BLACK:
                         current = players[PieceColor.RED]
                     elif current.color == PieceColor.RED:
                         current = players[PieceColor.BLACK]
     winner = board.game_ended()
+    if writer is not None:
+        writer.end_game(winner.split()[0])
     print(winner)
 
 @click.command(name="Checkers-gui")
@@ -194,15 +216,27 @@ def play_checker(board,players):
               type=click.Choice(['human'], case_sensitive=False),
               default="human")
 @click.option('--size',default=8)
-def cmd(mode, player1, player2, size):
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              default="object")
+@click.option('--archive', type=click.Path(dir_okay=False), default=None,
+              help="Archive file to append the game to.")
+def cmd(mode, player1, player2, size, engine, archive):
     if mode == "real":
-        board = CheckerBoard((size-1)//2)
+        board = new_board((size-1)//2, engine)
     elif mode == "stub":
         board = CheckerBoardStub((size-1)//2)
     player1 = GUIPlayer(1, player1, board, PieceColor.RED, PieceColor.BLACK)
     player2 = GUIPlayer(2, player2, board, PieceColor.BLACK, PieceColor.RED)
     players = {PieceColor.RED: player1, PieceColor.BLACK: player2}
-    play_checker(board, players)
+    if archive is None:
+        play_checker(board, players)
+        return
+    writer = GameWriter(archive)
+    try:
+        play_checker(board, players, writer)
+    finally:
+        writer.close()
 
 if __name__ == "__main__":
     cmd()
@@ -0,0 +1,992 @@
+from enum import Enum
+from logic.zobrist import SIDE_KEY, get_keys, kind
+
+PieceColor = Enum("PieceColor", ["RED", "BLACK"])
+
+# direction indices shared by the geometry tables below
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = range(4)
+UP_DIRS = (UP_LEFT, UP_RIGHT)
+DOWN_DIRS = (DOWN_LEFT, DOWN_RIGHT)
+ALL_DIRS = UP_DIRS + DOWN_DIRS
+
+RED = PieceColor.RED.value
+BLACK = PieceColor.BLACK.value
+# directions a piece may jump in, keyed by (color, is_king), in the same order
+# as logic.piece.Piece explores them: forward first, then backward
+JUMP_DIRS = {
+    (RED, False): DOWN_DIRS, (RED, True): DOWN_DIRS + UP_DIRS,
+    (BLACK, False): UP_DIRS, (BLACK, True): UP_DIRS + DOWN_DIRS,
+}
+
+
+class Geometry:
+    '''
+    Precomputed bit layout of a board of a given size. Squares are numbered
+    row by row with one extra "ghost" column per row, so that shifting a mask
+    diagonally off the left or right edge lands on a ghost bit instead of
+    wrapping onto the next row. Ghost bits are never part of the dark mask.
+
+    Public Attributes:
+    size (int): number of rows (and columns) of the board
+    up (tuple[int]): how many bits a mask shifts right to move up_left and
+        up_right
+    down (tuple[int]): how many bits a mask shifts left to move down_left and
+        down_right
+    dark (int): mask of all dark (playable) squares
+    moves (dict): maps (color, is_king) to, for every bit, the tuple of
+        squares a piece there may step to
+    jumps (dict): maps (color, is_king) to, for every bit, the tuple of
+        (jumped square, landing square) pairs a piece there may jump through
+    hops (dict): maps each color to the (is_king, rank, shift) of each
+        direction its men, then its kings, may jump in: the place of the
+        direction in the order kings of the color jump in, and how many bits
+        a square is ahead of the one next to it that way, negative going up
+    locs (list[tuple(int, int)]): (row, col) of every bit
+    bit_of (dict): maps (row, col) of every dark square to its bit
+    zobrist (list[list[int]]): for each piece kind, the Zobrist key of every
+        bit, equal to the key logic.zobrist gives its (row, col)
+    crown (int): mask of the first and last rows, where men are kinged
+    start_key (int): the Zobrist key of the start position
+    '''
+
+    def __init__(self, size):
+        '''
+        Constructor
+
+        Args:
+            size (int): the number of rows (and columns) of the board
+        '''
+        self.size = size
+        width = size + 1
+        self.up = (width + 1, width - 1)
+        self.down = (width - 1, width + 1)
+        nbits = size * width
+        self.dark = 0
+        self.crown = 0
+        self.red_start = 0
+        self.black_start = 0
+        self.locs = [None] * nbits
+        self.bit_of = {}
+        step = [[-1] * nbits for _ in ALL_DIRS]
+        land = [[-1] * nbits for _ in ALL_DIRS]
+        moves = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+        for i in range(size):
+            for j in range(size):
+                bit = i * width + j
+                self.locs[bit] = (i, j)
+                if (i + j) % 2 == 0:
+                    continue
+                self.dark |= 1 << bit
+                self.bit_of[(i, j)] = bit
+                if i in (0, size - 1):
+                    self.crown |= 1 << bit
+                if i < size / 2 - 1:
+                    self.red_start |= 1 << bit
+                elif i > size / 2:
+                    self.black_start |= 1 << bit
+                for dire, (di, dj) in enumerate(moves):
+                    if self.__possible(i + di, j + dj):
+                        step[dire][bit] = (i + di) * width + j + dj
+                    if self.__possible(i + 2 * di, j + 2 * dj):
+                        land[dire][bit] = (i + 2 * di) * width + j + 2 * dj
+        self.moves = {}
+        self.jumps = {}
+        for (color, is_king), dirs in JUMP_DIRS.items():
+            move_dirs = ALL_DIRS if is_king else dirs
+            self.moves[color, is_king] = [tuple(step[dire][bit]
+                for dire in move_dirs if step[dire][bit] >= 0)
+                for bit in range(nbits)]
+            self.jumps[color, is_king] = [tuple((step[dire][bit],
+                land[dire][bit]) for dire in dirs if land[dire][bit] >= 0)
+                for bit in range(nbits)]
+        shifts = dict(zip(UP_DIRS, (-shift for shift in self.up)))
+        shifts.update(zip(DOWN_DIRS, self.down))
+        self.hops = {color: tuple((is_king, JUMP_DIRS[color, True].index(
+            dire), shifts[dire]) for is_king in (False, True)
+            for dire in JUMP_DIRS[color, is_king]) for color in (RED, BLACK)}
+        keys = get_keys(size)
+        self.zobrist = [[keys[k][loc[0] * size + loc[1]] if loc else 0
+            for loc in self.locs] for k in range(4)]
+        self.start_key = 0
+        for bit in bits(self.red_start):
+            self.start_key ^= self.zobrist[kind(RED, False)][bit]
+        for bit in bits(self.black_start):
+            self.start_key ^= self.zobrist[kind(BLACK, False)][bit]
+
+    def __possible(self, row, col):
+        '''
+        Test whether a location is a valid position within the board
+
+        Returns: bool: whether this location is valid
+        '''
+        return 0 <= row < self.size and 0 <= col < self.size
+
+
+_GEOMETRIES = {}
+
+def get_geometry(size):
+    '''
+    Returns the shared Geometry of a board size, building it on first use.
+    '''
+    geo = _GEOMETRIES.get(size)
+    if geo is None:
+        geo = _GEOMETRIES[size] = Geometry(size)
+    return geo
+
+
+def _first(item):
+    '''
+    Returns the first element of a tuple, as a sort key
+    '''
+    return item[0]
+
+
+def bits(mask):
+    '''
+    Iterates over the indices of the set bits of a mask, lowest first.
+    '''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PieceView:
+    '''
+    Read-only snapshot of a piece on a BitboardCheckerBoard, mirroring the
+    attributes of logic.piece.Piece that the frontends read.
+
+    Public Attributes:
+    color (PieceColor.COLOR.value): color of the piece
+    is_king (bool): whether the piece is king
+    '''
+    __slots__ = ('color', 'is_king', '_loc')
+
+    def __init__(self, color, is_king, loc):
+        self.color = color
+        self.is_king = is_king
+        self._loc = loc
+
+    def return_loc(self):
+        '''
+        Returns the location of the piece (row, col) (tuple of int)
+        '''
+        return self._loc
+
+
+class BitboardCheckerBoard:
+    '''
+    Drop-in alternative to CheckerBoard that keeps the position as three
+    integer bitmasks (red pieces, black pieces and kings) and generates moves
+    with shifts and masks instead of walking Square and Piece objects.
+
+    Public Atttributes: None
+    '''
+
+    def __init__(self, n = 3, draw_plies = None):
+        '''
+        Intializes the checker board
+
+        Args:
+        n (int): the number of rows of pieces for each player
+        draw_plies (int): the game is drawn after this many plies in a row
+            without a capture or a promotion, None for no limit
+        '''
+        self.__size = 2 * n + 2
+        self.__geo = get_geometry(self.__size)
+        self.__draw_plies = draw_plies
+        self.initialize_board()
+
+    def initialize_board(self):
+        '''
+        Intializes the positions of the pieces for the board.
+        '''
+        self.__red = self.__geo.red_start
+        self.__black = self.__geo.black_start
+        self.__kings = 0
+        self.__turn = RED
+        self.__key = self.__geo.start_key
+        #__legal_cache : player -> (position key, legal moves of the player)
+        self.__legal_cache = {}
+        #__status : (position key, result of game_ended() for that position)
+        self.__status = (None, None)
+        self.__start_history()
+
+    def __start_history(self):
+        '''
+        Starts the position history over from the current position
+        '''
+        #__history : (position key, plies since the last capture or promotion)
+        #   after every turn, for unmake_move() to go back through
+        self.__history = [(self.__key, 0)]
+        #__seen : position key -> how many times the position was reached
+        self.__seen = {self.__key: 1}
+        #__progress : whether the current turn captured or promoted a piece
+        self.__progress = False
+
+    def reset(self):
+        '''
+        Puts the board back to the start position in place, which is much
+        cheaper than a new board.
+        '''
+        self.initialize_board()
+
+    def load_board(self, board, turn = RED):
+        '''
+        Replaces the position with the one given, for example to analyse a
+        saved position.
+
+        Args:
+            board (list[list[str]]): the type of each square, in the format
+                returned by return_board()
+            turn (PieceColor.COLOR.value): the player to move
+
+        Raises:
+            ValueError if the board does not have the size of this board, or
+                has an unknown square type or a piece on a light square
+        '''
+        if turn not in (RED, BLACK) or len(board) != self.__size:
+            raise ValueError
+        red = black = kings = 0
+        for i, row in enumerate(board):
+            if len(row) != self.__size:
+                raise ValueError
+            for j, letter in enumerate(row):
+                bit = self.__geo.bit_of.get((i, j))
+                if letter not in 'ldrRbB' or len(letter) != 1 or \
+                    (letter == 'l') != (bit is None):
+                    raise ValueError
+                if letter in 'rR':
+                    red |= 1 << bit
+                elif letter in 'bB':
+                    black |= 1 << bit
+                if letter in 'RB':
+                    kings |= 1 << bit
+        self.__red, self.__black, self.__kings = red, black, kings
+        self.__turn = turn
+        self.__key = SIDE_KEY if turn == BLACK else 0
+        zobrist = self.__geo.zobrist
+        for bit in bits(red | black):
+            color = RED if red >> bit & 1 else BLACK
+            self.__key ^= zobrist[kind(color, bool(kings >> bit & 1))][bit]
+        self.__legal_cache = {}
+        self.__status = (None, None)
+        self.__start_history()
+
+    def clone(self):
+        '''
+        Returns an independent copy of the board, for example to play a game
+        out without touching this one. This is much cheaper than building a
+        new board and loading the position into it.
+
+        Returns: BitboardCheckerBoard: the copy
+        '''
+        copy = BitboardCheckerBoard.__new__(BitboardCheckerBoard)
+        copy.__size, copy.__geo = self.__size, self.__geo
+        copy.__red, copy.__black, copy.__kings = \
+            self.__red, self.__black, self.__kings
+        copy.__turn, copy.__key = self.__turn, self.__key
+        # the cached results are never modified, so they can be shared
+        copy.__legal_cache = dict(self.__legal_cache)
+        copy.__status = self.__status
+        copy.__draw_plies = self.__draw_plies
+        copy.__history = list(self.__history)
+        copy.__seen = dict(self.__seen)
+        copy.__progress = self.__progress
+        return copy
+
+    def __sides(self, player):
+        '''
+        Returns the masks (own pieces, opponent pieces) of a player
+
+        Raises:
+            ValueError if player is not valid
+        '''
+        if player == RED:
+            return self.__red, self.__black
+        elif player == BLACK:
+            return self.__black, self.__red
+        raise ValueError
+
+    def __jumpers(self, player):
+        '''
+        Returns the mask of the pieces of a player that can jump
+        '''
+        own, opp = self.__sides(player)
+        if player == RED:
+            down, up = own, own & self.__kings
+        else:
+            down, up = own & self.__kings, own
+        geo = self.__geo
+        empty = geo.dark & ~(self.__red | self.__black)
+        result = 0
+        for shift in geo.down:
+            result |= ((empty >> shift) & opp) >> shift & down
+        for shift in geo.up:
+            result |= ((empty << shift) & opp) << shift & up
+        return result
+
+    def __movers(self, player):
+        '''
+        Returns the mask of the pieces of a player that can make a simple move
+        '''
+        own, _ = self.__sides(player)
+        if player == RED:
+            down, up = own, own & self.__kings
+        else:
+            down, up = own & self.__kings, own
+        geo = self.__geo
+        empty = geo.dark & ~(self.__red | self.__black)
+        result = 0
+        for shift in geo.down:
+            result |= (empty >> shift) & down
+        for shift in geo.up:
+            result |= (empty << shift) & up
+        return result
+
+    def __all_simple_moves(self, player):
+        '''
+        Returns every simple move of a player as (start bit, destination bit)
+        pairs, found a direction at a time for all its pieces with mask
+        shifts, ordered by start bit then direction like __simple_moves()
+        '''
+        own, _ = self.__sides(player)
+        if player == RED:
+            down, up = own, own & self.__kings
+        else:
+            down, up = own & self.__kings, own
+        geo = self.__geo
+        empty = geo.dark & ~(self.__red | self.__black)
+        moves = []
+        if up:
+            for dire, shift in zip(UP_DIRS, geo.up):
+                moves += [(dest + shift, dire, dest)
+                          for dest in bits((up >> shift) & empty)]
+        if down:
+            for dire, shift in zip(DOWN_DIRS, geo.down):
+                moves += [(dest - shift, dire, dest)
+                          for dest in bits((down << shift) & empty)]
+        moves.sort()
+        return moves
+
+    def __all_jumps(self, player):
+        '''
+        Returns every jump path of a player as (start bit, path) pairs, an
+        empty list if it has none. The pieces able to jump, and where they
+        land, are found a direction at a time with mask shifts over all its
+        men and all its kings, as are the landings a piece may jump on from;
+        only the pieces landing there are followed depth first. The moves
+        are ordered by start bit, then like __jump_paths()
+        '''
+        geo = self.__geo
+        own, opp = self.__sides(player)
+        empty = geo.dark & ~(self.__red | self.__black)
+        kings = own & self.__kings
+        men = own ^ kings
+        landed = []
+        for is_king, rank, shift in geo.hops[player]:
+            pieces = kings if is_king else men
+            if not pieces:
+                continue
+            if shift > 0:
+                starts = (empty >> shift & opp) >> shift & pieces
+            else:
+                starts = (empty << -shift & opp) << -shift & pieces
+            if starts:
+                landed.append((is_king, rank, shift, starts))
+        if not landed:
+            return landed
+
+        # the landings men and kings may jump on from: a man landing on the
+        # crown row is kinged and stops there, and the piece jumped can't be
+        # jumped back, as the square behind it, where the piece started,
+        # counts as taken
+        onward = [0, 0]
+        for is_king, _, shift, starts in landed:
+            onward[is_king] |= starts << 2 * shift if shift > 0 else \
+                starts >> -2 * shift
+        onward[False] &= ~geo.crown
+        going = [0, 0]
+        if onward[False] or onward[True]:
+            for is_king, _, shift in geo.hops[player]:
+                ahead = onward[is_king]
+                if not ahead:
+                    continue
+                if shift > 0:
+                    going[is_king] |= (empty >> shift & opp) >> shift & ahead
+                else:
+                    going[is_king] |= (empty << -shift & opp) << -shift & \
+                        ahead
+        found = []
+        for is_king, rank, shift, starts in landed:
+            for start in bits(starts):
+                land = start + 2 * shift
+                if going[is_king] >> land & 1:
+                    paths = []
+                    self.__extend_jumps(land, geo.jumps[player, is_king],
+                        is_king, opp, empty, 1 << start + shift, [land], paths)
+                    found += [(4 * start + rank, path) for path in paths]
+                else:
+                    found.append((4 * start + rank, [land]))
+        if len(found) > 1:
+            # the sort is stable, so the paths of a hop keep their order
+            found.sort(key=_first)
+        return [(order >> 2, path) for order, path in found]
+
+    def __jump_paths(self, bit, color):
+        '''
+        Returns every jump path of the piece on a bit as lists of bit indices
+        '''
+        is_king = bool(self.__kings >> bit & 1)
+        opp = self.__black if color == RED else self.__red
+        empty = self.__geo.dark & ~(self.__red | self.__black)
+        paths = []
+        self.__extend_jumps(bit, self.__geo.jumps[color, is_king], is_king,
+            opp, empty, 0, [], paths)
+        return paths
+
+    def __extend_jumps(self, bit, table, is_king, opp, empty, captured,
+        prefix, paths):
+        '''
+        Depth-first helper for __jump_paths(). Pieces already captured stay on
+        the board (so they block landings) but cannot be jumped again.
+        '''
+        for mid, land in table[bit]:
+            if not (opp >> mid & 1) or captured >> mid & 1 or \
+                not (empty >> land & 1):
+                continue
+            path = prefix + [land]
+            if not is_king and self.__geo.crown >> land & 1:
+                # the piece is kinged at this step, so the jump stops here
+                paths.append(path)
+                continue
+            before = len(paths)
+            self.__extend_jumps(land, table, is_king, opp, empty,
+                captured | 1 << mid, path, paths)
+            if len(paths) == before:
+                paths.append(path)
+
+    def __extend_tree(self, bit, table, is_king, opp, empty, captured, node):
+        '''
+        Depth-first helper for jump_tree(), following the same rules as
+        __extend_jumps()
+        '''
+        geo = self.__geo
+        for mid, land in table[bit]:
+            if not (opp >> mid & 1) or captured >> mid & 1 or \
+                not (empty >> land & 1):
+                continue
+            child = node[geo.locs[land]] = {}
+            # the piece is kinged at this step, so the jump stops here
+            if is_king or not (geo.crown >> land & 1):
+                self.__extend_tree(land, table, is_king, opp, empty,
+                    captured | 1 << mid, child)
+
+    def __one_jumps(self, bit, color):
+        '''
+        Returns the landing bits of the single jumps of the piece on a bit
+        '''
+        opp = self.__black if color == RED else self.__red
+        empty = self.__geo.dark & ~(self.__red | self.__black)
+        table = self.__geo.jumps[color, bool(self.__kings >> bit & 1)]
+        return [land for mid, land in table[bit]
+            if opp >> mid & 1 and empty >> land & 1]
+
+    def __simple_moves(self, bit, color):
+        '''
+        Returns the destination bits of the simple moves of the piece on a bit
+        '''
+        occupied = self.__red | self.__black
+        table = self.__geo.moves[color, bool(self.__kings >> bit & 1)]
+        return [dest for dest in table[bit] if not (occupied >> dest & 1)]
+
+    def __occupied(self, loc):
+        '''
+        Returns the bit index and color of the piece at a location
+
+        Raises:
+            ValueError if the location is not valid or holds no piece
+        '''
+        try:
+            bit = self.__geo.bit_of[loc]
+        except (KeyError, TypeError):
+            raise ValueError
+        if self.__red >> bit & 1:
+            return bit, RED
+        if self.__black >> bit & 1:
+            return bit, BLACK
+        raise ValueError
+
+    def __to_locs(self, paths):
+        '''
+        Converts lists of bit indices to lists of (row, col) locations
+        '''
+        locs = self.__geo.locs
+        return [[locs[bit] for bit in path] for path in paths]
+
+    def get_player_piece(self, player):
+        '''
+        Helper function for getting the locations of the pieces of a player
+
+        Args:
+        player (PieceColor.color.value): chosen player
+
+        Returns: list[tuple(int, int)]: list of locations of each piece the
+            player have
+        '''
+        own, _ = self.__sides(player)
+        return [self.__geo.locs[bit] for bit in bits(own)]
+
+    def get_player_kings(self, player):
+        '''
+        Helper function for getting the locations of the kings of a player
+
+        Args:
+        player (PieceColor.color.value): chosen player
+
+        Returns: list[tuple(int, int)]: list of locations of each king the
+            player have
+        '''
+        own, _ = self.__sides(player)
+        return [self.__geo.locs[bit] for bit in bits(own & self.__kings)]
+
+    def print_board(self):
+        '''
+        Prints the board for display in terminal.
+        '''
+        print(''.join('\n' + ''.join(row) for row in self.return_board()))
+
+    def return_board(self):
+        '''
+        Returns workable version of the board, specifying only the types of
+        squares (and types of pieces stored on the squares) in a 2D list.
+
+        Returns: list[list[str]]: A 2D list of types of each square, using the
+            same letters as CheckerBoard.return_board()
+        '''
+        width = self.__size + 1
+        red, black, kings = self.__red, self.__black, self.__kings
+        result = []
+        for i in range(self.__size):
+            row = []
+            for j in range(self.__size):
+                bit = i * width + j
+                if (i + j) % 2 == 0:
+                    row.append('l')
+                elif red >> bit & 1:
+                    row.append('R' if kings >> bit & 1 else 'r')
+                elif black >> bit & 1:
+                    row.append('B' if kings >> bit & 1 else 'b')
+                else:
+                    row.append('d')
+            result.append(row)
+        return result
+
+    def possible_pieces(self, player):
+        '''
+        Get all pieces that can be moved by the specified player
+
+        Args:
+            player (PieceColor.COLOR.value): the player who selects a piece
+
+        Raises:
+            ValueError if player is not valid
+
+        Returns: set(tuple(int)): a set of locations of moveable pieces
+        '''
+        movable = self.__jumpers(player) or self.__movers(player)
+        return {self.__geo.locs[bit] for bit in bits(movable)}
+
+    def legal_moves(self, player):
+        '''
+        Get every legal move of the specified player, applying the forced
+        capture rule. The list is computed once per position and shared by
+        later calls, so it must not be modified.
+
+        Args:
+            player (PieceColor.COLOR.value): the player to move
+
+        Raises:
+            ValueError if player is not valid
+
+        Returns: list[tuple(tuple(int), list[tuple(int)])]: the location of
+            each moveable piece with one path it can take, ordered by location
+        '''
+        cached = self.__legal_cache.get(player)
+        if cached is not None and cached[0] == self.__key:
+            return cached[1]
+        locs = self.__geo.locs
+        jumps = self.__all_jumps(player)
+        if jumps:
+            moves = [(locs[bit], [locs[land] for land in path])
+                for bit, path in jumps]
+        else:
+            moves = [(locs[bit], [locs[dest]])
+                for bit, _, dest in self.__all_simple_moves(player)]
+        self.__legal_cache[player] = (self.__key, moves)
+        return moves
+
+    def possible_moves(self, loc):
+        '''
+        Get all possible moves of the piece selected. Jumps are returned if the
+        piece can jump, simple moves otherwise.
+
+        Args:
+            loc (tuple(int)): the location of the selected piece
+
+        Raises:
+            ValueError if location specified is not valid
+
+        Returns:
+            moves (list[list[tuple(int)]]): a list of paths the piece can take
+        '''
+        bit, color = self.__occupied(loc)
+        paths = self.__jump_paths(bit, color)
+        if paths:
+            return self.__to_locs(paths)
+        locs = self.__geo.locs
+        return [[locs[dest]] for dest in self.__simple_moves(bit, color)]
+
+    def possible_jumps(self, loc):
+        '''
+        get all possible jumps of the specified piece
+
+        Args:
+            loc (tuple(int)): the location of the selected piece
+
+        Raises:
+            ValueError if location specified is not valid
+
+        Returns:
+            possibles (list[list[tuple(int)]]): a list of possible jump paths
+        '''
+        return self.__to_locs(self.__jump_paths(*self.__occupied(loc)))
+
+    def jump_tree(self, loc):
+        '''
+        get all possible jumps of the specified piece as a jump tree (see
+        logic.jumptree), which stores shared first steps only once
+
+        Args:
+            loc (tuple(int)): the location of the selected piece
+
+        Raises:
+            ValueError if location specified is not valid
+
+        Returns:
+            tree (dict{tuple(int) : dict}): maps each first landing square to
+                the tree of the jumps that may follow it
+        '''
+        bit, color = self.__occupied(loc)
+        is_king = bool(self.__kings >> bit & 1)
+        opp = self.__black if color == RED else self.__red
+        tree = {}
+        self.__extend_tree(bit, self.__geo.jumps[color, is_king], is_king,
+            opp, self.__geo.dark & ~(self.__red | self.__black), 0, tree)
+        return tree
+
+    def __relocate(self, start, dest):
+        '''
+        Moves the piece on bit start to bit dest, kinging it if it reaches the
+        first or last row.
+        '''
+        move = 1 << start | 1 << dest
+        color = RED if self.__red >> start & 1 else BLACK
+        if color == RED:
+            self.__red ^= move
+        else:
+            self.__black ^= move
+        is_king = bool(self.__kings >> start & 1)
+        zobrist = self.__geo.zobrist
+        keys = zobrist[kind(color, is_king)]
+        self.__key ^= keys[start] ^ keys[dest]
+        if is_king:
+            self.__kings ^= move
+        elif self.__geo.crown >> dest & 1:
+            self.__kings |= 1 << dest
+            self.__key ^= keys[dest] ^ zobrist[kind(color, True)][dest]
+            self.__progress = True
+
+    def __capture(self, start, dest):
+        '''
+        Removes the piece jumped over when going from bit start to bit dest
+        '''
+        # rows are a fixed number of bits apart, so the jumped square sits
+        # exactly halfway between the two bit indices
+        mid = (start + dest) // 2
+        color = RED if self.__red >> mid & 1 else BLACK
+        self.__key ^= self.__geo.zobrist[kind(color,
+            bool(self.__kings >> mid & 1))][mid]
+        self.__red &= ~(1 << mid)
+        self.__black &= ~(1 << mid)
+        self.__kings &= ~(1 << mid)
+        self.__progress = True
+
+    def __end_turn(self):
+        '''
+        Passes the turn to the other player and adds the position reached to
+        the history
+        '''
+        self.__turn = BLACK if self.__turn == RED else RED
+        self.__key ^= SIDE_KEY
+        quiet = 0 if self.__progress else self.__history[-1][1] + 1
+        self.__progress = False
+        self.__history.append((self.__key, quiet))
+        self.__seen[self.__key] = self.__seen.get(self.__key, 0) + 1
+
+    def get_turn(self):
+        '''
+        Returns the player to move (PieceColor.COLOR.value)
+        '''
+        return self.__turn
+
+    def get_hash(self):
+        '''
+        Returns the 64-bit Zobrist key of the position and the player to move
+        (int). It matches CheckerBoard.get_hash() for the same position.
+        '''
+        return self.__key
+
+    def move(self, initial_loc, final_loc):
+        '''
+        Move a piece from initial loc to final loc
+
+        Args:
+            Initial_loc (tuple of int): location of the piece to be moved
+            Final_loc (tuple of int): location the piece is to be moved to
+
+        Raises:
+            ValueError if move is invalid
+        '''
+        start, color = self.__occupied(initial_loc)
+        dest = self.__geo.bit_of.get(final_loc)
+        if dest not in self.__simple_moves(start, color):
+            raise ValueError
+        self.__relocate(start, dest)
+        self.__end_turn()
+
+    def one_jump(self, loc, step, last = None):
+        '''
+        One step jump from loc to step.
+
+        Caution: this function does not check if this jump is valid within a
+        sequence of moves. For a complete sequence of jumps with validity
+        checks, use self.jump(). The turn passes to the other player once the
+        piece cannot jump any further.
+
+        Args:
+            loc (tuple of int): location of the piece to be jumped
+            step (tuple of int): location the piece is to be jumped to
+            last (bool): whether this is the last hop of the jump, as told
+                by the jump tree of the piece, see CheckerBoard.one_jump().
+                If None, the board decides
+
+        Raises:
+            ValueError if move is invalid.
+        '''
+        start, color = self.__occupied(loc)
+        dest = self.__geo.bit_of.get(step)
+        if dest not in self.__one_jumps(start, color):
+            raise ValueError
+        was_king = self.__kings >> start & 1
+        self.__relocate(start, dest)
+        self.__capture(start, dest)
+        # a piece that has just been kinged stops jumping
+        if last is None:
+            last = self.__kings >> dest & 1 != was_king or \
+                not self.__one_jumps(dest, color)
+        if last:
+            self.__end_turn()
+
+    def jump(self, loc, steps):
+        '''
+        Jump a piece from loc through a series of jump steps.
+
+        Args:
+            loc (tuple of int): location of the piece to be jumped
+            steps list[tuple of int]: list of locations for each step of the
+                jump
+
+        Raises:
+            ValueError if jump is invalid
+        '''
+        start, color = self.__occupied(loc)
+        if list(steps) not in self.__to_locs(self.__jump_paths(start, color)):
+            raise ValueError
+        for step in steps:
+            dest = self.__geo.bit_of[step]
+            self.__relocate(start, dest)
+            self.__capture(start, dest)
+            start = dest
+        self.__end_turn()
+
+    def play(self, loc, steps):
+        '''
+        Move a piece from loc through a series of steps to a location. If it is
+        a jumpable, it will always attempt a jump. If it is a move, the steps
+        would always be of length 1.
+
+        Args:
+            loc (tuple of int): location of the piece to be jumped
+            steps list[tuple of int]: list of locations for each step of the
+                move
+
+        Raises:
+            ValueError if play is not valid.
+        '''
+        start, color = self.__occupied(loc)
+        steps = [tuple(step) for step in steps]
+        paths = self.__jump_paths(start, color)
+        if paths:
+            if steps not in self.__to_locs(paths):
+                raise ValueError
+        elif len(steps) != 1 or self.__geo.bit_of.get(steps[0]) not in \
+            self.__simple_moves(start, color):
+            raise ValueError
+        self.apply_move(loc, steps)
+
+    def make_move(self, loc, steps):
+        '''
+        Play a move so that it can be taken back with unmake_move().
+
+        Caution: this function does not check if the move is valid. It should
+        only be used with moves returned by possible_moves().
+
+        Args:
+            loc (tuple of int): location of the piece to be moved
+            steps list[tuple of int]: list of locations for each step of the
+                move
+
+        Returns: tuple: undo token to pass to unmake_move()
+        '''
+        token = (self.__red, self.__black, self.__kings, self.__key,
+            self.__turn)
+        self.apply_move(loc, steps)
+        return token
+
+    def apply_move(self, loc, steps):
+        '''
+        Play a move without checking it. This is the fast path for callers
+        that took the move from legal_moves() or possible_moves() of the
+        current position, such as bots, simulations and replays. Use play()
+        for moves that may be invalid.
+
+        Args:
+            loc (tuple of int): location of the piece to be moved
+            steps list[tuple of int]: list of locations for each step of the
+                move
+        '''
+        bit_of = self.__geo.bit_of
+        start = bit_of[loc]
+        row = loc[0]
+        for step in steps:
+            dest = bit_of[step]
+            self.__relocate(start, dest)
+            if abs(step[0] - row) == 2:
+                self.__capture(start, dest)
+            start, row = dest, step[0]
+        self.__end_turn()
+
+    def unmake_move(self, token):
+        '''
+        Take back a move played by make_move(). Moves must be taken back in
+        the reverse order they were made.
+
+        Args:
+            token (tuple): the undo token returned by make_move()
+        '''
+        self.__red, self.__black, self.__kings, self.__key, self.__turn = \
+            token
+        key, _ = self.__history.pop()
+        self.__seen[key] -= 1
+        if not self.__seen[key]:
+            del self.__seen[key]
+
+    def game_ended(self):
+        '''
+        Return the winner if the game has been won
+
+        A game that could go on is drawn once a position is reached for the
+        third time, or after draw_plies plies without a capture or a
+        promotion.
+
+        Returns: str: whether someone has win
+        Possible returns: DRAW, BLACK WINS, RED WINS, CONTINUE
+        '''
+        if self.__status[0] != self.__key:
+            if not self.__movable(RED):
+                status = 'DRAW' if not self.__movable(BLACK) else 'BLACK WINS'
+            elif not self.__movable(BLACK):
+                status = 'RED WINS'
+            else:
+                status = 'CONTINUE'
+            self.__status = (self.__key, status)
+        # the draw rules depend on the history, not only on the position
+        if self.__status[1] == 'CONTINUE' and self.drawn_by_rule():
+            return 'DRAW'
+        return self.__status[1]
+
+    def drawn_by_rule(self):
+        '''
+        Returns whether the position has been reached for the third time, or
+        draw_plies plies have been played without a capture or a promotion
+        (bool). game_ended() only draws such a game if both players can
+        still move.
+        '''
+        return self.__seen.get(self.__key, 0) >= 3 or \
+            self.__draw_plies is not None and \
+            self.__history[-1][1] >= self.__draw_plies
+
+    def get_quiet_plies(self):
+        '''
+        Returns the number of plies played since the last capture or
+        promotion (int)
+        '''
+        return self.__history[-1][1]
+
+    def get_draw_plies(self):
+        '''
+        Returns the number of plies without a capture or a promotion that
+        draws the game, or None if there is no limit
+        '''
+        return self.__draw_plies
+
+    def __movable(self, player):
+        '''
+        Return whether a player can move
+
+        Returns: bool: whether the player can still move
+        '''
+        return bool(self.__sides(player)[0] and
+            (self.__movers(player) or self.__jumpers(player)))
+
+    def get_piece_count(self, player):
+        '''
+        Returns the number of pieces a player has left (int)
+
+        Raises:
+            ValueError if player is not valid
+        '''
+        return bin(self.__sides(player)[0]).count('1')
+
+    def get_board_size(self):
+        '''
+        Returns size of the board (tuple of int)
+        '''
+        return (self.__size, self.__size)
+
+    def get_piece(self, loc):
+        '''
+        Helper function. Returns a snapshot of the piece at the specified loc.
+
+        Inputs:
+            loc (tuple of int): the location of the piece to be obtained
+
+        Returns: the piece at the location (PieceView) or None if the location
+            contains no piece
+        '''
+        try:
+            bit, color = self.__occupied(loc)
+        except ValueError:
+            return None
+        return PieceView(color, bool(self.__kings >> bit & 1), loc)
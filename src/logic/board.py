@@ -1,9 +1,61 @@
 from enum import Enum
+from types import MappingProxyType
 from logic.side import Side
 from logic.piece import Piece
+from logic.zobrist import Zobrist
 
 PieceColor = Enum("PieceColor", ["RED", "BLACK"])
 SquareType = Enum("SquareType", ["LIGHT", "DARK"])
+RED = PieceColor.RED.value
+BLACK = PieceColor.BLACK.value
+
+DIRECTIONS = {'up_left': (-1, -1), 'up_right': (-1, 1), 'down_left': (1, -1),
+    'down_right': (1, 1)}
+# pieces never stand on light squares, so they all share one empty mapping
+# instead of being wired to each other
+NOT_CONNECTED = MappingProxyType({dire: None for dire in DIRECTIONS})
+# directions a piece may move in, keyed by (color, is_king)
+MOVE_DIRS = {(RED, False): Piece.DOWN_DIRS, (BLACK, False): Piece.UP_DIRS,
+    (RED, True): Piece.ALL_DIRS, (BLACK, True): Piece.ALL_DIRS}
+
+_GEOMETRIES = {}
+
+def get_geometry(size):
+    '''
+    Returns the layout shared by every board of a size, building it on first
+    use. Squares are numbered row by row, so (row, col) is row * size + col.
+
+    Args:
+        size (int): the number of rows (and columns) of the board
+
+    Returns: list[tuple]: for each square, its location, its type, and two
+        dicts mapping each direction to the number of the neighbouring square
+        and of the square a jump lands on (None when off the board)
+    '''
+    geometry = _GEOMETRIES.get(size)
+    if geometry is None:
+        geometry = []
+        for i in range(size):
+            for j in range(size):
+                if (i + j) % 2 == 0:
+                    square_type = SquareType.LIGHT.value
+                else:
+                    square_type = SquareType.DARK.value
+                connected, landing = {}, {}
+                for dire, (di, dj) in DIRECTIONS.items():
+                    connected[dire] = _number(size, i + di, j + dj)
+                    landing[dire] = _number(size, i + 2 * di, j + 2 * dj)
+                geometry.append(((i, j), square_type, connected, landing))
+        _GEOMETRIES[size] = geometry
+    return geometry
+
+def _number(size, row, col):
+    '''
+    Returns the number of a square, or None if it is not within the board
+    '''
+    if 0 <= row < size and 0 <= col < size:
+        return row * size + col
+    return None
 
 class CheckerBoard:
     '''
@@ -12,12 +64,14 @@ class CheckerBoard:
     Public Atttributes: None
     '''
 
-    def __init__(self, n = 3):
+    def __init__(self, n = 3, draw_plies = None):
         '''
         Intializes the checker board
 
         Args:
         n (int): the number of rows of pieces for each player
+        draw_plies (int): the game is drawn after this many plies in a row
+            without a capture or a promotion, None for no limit
         '''
         # we want to create pieces here then add the pieces to players when we 
         # initilalize the board below
@@ -25,8 +79,13 @@ class CheckerBoard:
         #__players : two sides of the game labeled by color
         self.__players = {PieceColor.RED.value : Side('RED'), \
             PieceColor.BLACK.value : Side('BLACK')}
+        #__zobrist : position key, kept up to date by the pieces and the board
+        self.__zobrist = Zobrist(self.__size)
+        #__legal_cache : player -> (position key, legal moves of the player)
+        self.__legal_cache = {}
+        self.__draw_plies = draw_plies
         # create the board and initalize pieces positions
-        # private attribute: __board, __size
+        # private attribute: __board, __size, __turn
         self.create_board()
         self.initialize_board()
 
@@ -46,53 +105,41 @@ class CheckerBoard:
             locs.append(piece.return_loc())
         return locs
 
+    def get_player_kings(self, player):
+        '''
+        Helper function for getting the locations of the kings of a player
+
+        Args:
+        player (PieceColor.color.value): chosen player
+
+        Returns: list[tuple(int, int)]: list of locations of each king the
+            player have
+        '''
+        return [piece.return_loc() for piece in self.__players[player].pieces \
+            if piece.is_king]
+
     def create_board(self):
         '''
         Create the board.
         '''
-        # construct the board
-        self.__board = []
-        for i in range(0, self.__size):
-            row = []
-            if i % 2 == 0:
-                for j in range(0, self.__size):
-                        if j % 2 == 0:
-                            row.append(Square((i, j), SquareType.LIGHT.value))
-                        else:
-                            row.append(Square((i, j), SquareType.DARK.value))
-            else:
-                for j in range(0, self.__size):
-                    if j % 2 == 1:
-                        row.append(Square((i, j), SquareType.LIGHT.value))
-                    else:
-                        row.append(Square((i, j), SquareType.DARK.value))
-            self.__board.append(row)
+        # the layout of a board only depends on its size, so it is computed
+        # once and shared; only the squares themselves are built per board
+        geometry = get_geometry(self.__size)
+        squares = [Square(loc, square_type) for loc, square_type, _, _ in \
+            geometry]
+        self.__board = [squares[i:i + self.__size] for i in \
+            range(0, len(squares), self.__size)]
 
         # add connections between squares 
         # the goal is a graph we can iterate through
-        for i in range(0, self.__size):
-            for j in range(0, self.__size):
-                square = self.__board[i][j]
-                if self.__possible((i-1, j-1)):
-                    square.connected['up_left'] = self.__board[i-1][j-1]
-                if self.__possible((i-1, j+1)):
-                    square.connected['up_right'] = self.__board[i-1][j+1]
-                if self.__possible((i+1, j-1)):
-                    square.connected['down_left'] = self.__board[i+1][j-1]
-                if self.__possible((i+1, j+1)):
-                    square.connected['down_right'] = self.__board[i+1][j+1]
-    
-    def __possible(self, loc):
-        '''
-        Test whether a location is a valid position within the board
-
-        Args:
-        loc: tuple(int, int): the row and col of the location to check
-
-        Returns: bool: whether this location is valid
-        '''
-        row, col = loc
-        return row >= 0 and row < self.__size and  col >= 0 and col < self.__size
+        dark = SquareType.DARK.value
+        for square, (_, square_type, connected, landing) in zip(squares, \
+            geometry):
+            if square_type == dark:
+                square.connected = {dire: None if number is None else \
+                    squares[number] for dire, number in connected.items()}
+                square.landing = {dire: None if number is None else \
+                    squares[number] for dire, number in landing.items()}
 
     def initialize_board(self):
         '''
@@ -102,24 +149,162 @@ class CheckerBoard:
         #clear pieces for both player
         for _, player in self.__players.items():
             player.pieces = set()
+        self.__zobrist.key = 0
+        self.__turn = PieceColor.RED.value
+        self.__legal_cache = {}
 
         #Loop through the dark squares of the board. Clear the square and add
         #the correct piece if needed
-        for i in range(0, self.__size):
-            for j in range(0, self.__size):
+        red, black = PieceColor.RED.value, PieceColor.BLACK.value
+        light = SquareType.LIGHT.value
+        for (i, j), square_type, _, _ in get_geometry(self.__size):
+            if square_type != light:
                 square = self.__board[i][j]
-                if square.return_type() != 'LIGHT':
-                    square.empty()
-                    if i < self.__size / 2 - 1:
-                        piece = Piece(PieceColor.RED.value, square, self.__size)
-                        self.__players[PieceColor.RED.value].add_piece(piece)
-                        square.add_piece(piece)
-                    elif i > self.__size / 2:
-                        piece = Piece(PieceColor.BLACK.value, square, \
-                            self.__size)
-                        self.__players[PieceColor.BLACK.value].add_piece(piece)
-                        square.add_piece(piece)
+                square.empty()
+                if i < self.__size / 2 - 1:
+                    piece = Piece(red, square, self.__size, self.__zobrist)
+                    self.__players[red].add_piece(piece)
+                    square.add_piece(piece)
+                elif i > self.__size / 2:
+                    piece = Piece(black, square, self.__size, self.__zobrist)
+                    self.__players[black].add_piece(piece)
+                    square.add_piece(piece)
+        #__start : the pieces and their squares at the start, for reset()
+        self.__start = [(piece, piece.square) for player in \
+            self.__players.values() for piece in player.pieces]
+        self.__start_key = self.__zobrist.key
+        self.__find_mobile()
+        self.__start_history()
+
+    def __start_history(self):
+        '''
+        Starts the position history over from the current position
+        '''
+        key = self.__zobrist.key
+        #__history : (position key, plies since the last capture or promotion)
+        #   after every turn, for unmake_move() to go back through
+        self.__history = [(key, 0)]
+        #__seen : position key -> how many times the position was reached
+        self.__seen = {key: 1}
+        #__progress : whether the current turn captured or promoted a piece
+        self.__progress = False
+
+    def reset(self):
+        '''
+        Puts the board back to the start position in place. The squares and
+        the pieces of the start position are reused rather than built again,
+        which makes it much cheaper than a new board.
+        '''
+        if self.__start is None:
+            # a clone has no start pieces of its own yet
+            self.initialize_board()
+            return
+        for row in self.__board:
+            for square in row:
+                square.occupied_by = None
+        for _, player in self.__players.items():
+            player.pieces.clear()
+        for piece, square in self.__start:
+            piece.square = square
+            piece.is_king = False
+            square.occupied_by = piece
+            self.__players[piece.color].pieces.add(piece)
+        self.__zobrist.key = self.__start_key
+        self.__turn = PieceColor.RED.value
+        self.__legal_cache = {}
+        self.__find_mobile()
+        self.__start_history()
                
+    def load_board(self, board, turn = PieceColor.RED.value):
+        '''
+        Replaces the position with the one given, for example to analyse a
+        saved position.
+
+        Args:
+            board (list[list[str]]): the type of each square, in the format
+                returned by return_board()
+            turn (PieceColor.COLOR.value): the player to move
+
+        Raises:
+            ValueError if the board does not have the size of this board, or
+                has an unknown square type or a piece on a light square
+        '''
+        if turn not in self.__players or len(board) != self.__size:
+            raise ValueError
+        for i, row in enumerate(board):
+            if len(row) != self.__size:
+                raise ValueError
+            for j, letter in enumerate(row):
+                light = self.__board[i][j].return_type() == 'LIGHT'
+                if letter not in 'ldrRbB' or len(letter) != 1 or \
+                    (letter != 'l' and light) or (letter == 'l' and not light):
+                    raise ValueError
+
+        for _, player in self.__players.items():
+            player.pieces = set()
+        self.__zobrist.key = 0
+        self.__turn = PieceColor.RED.value
+        self.__legal_cache = {}
+        for i, row in enumerate(board):
+            for j, letter in enumerate(row):
+                square = self.__board[i][j]
+                square.empty()
+                if letter in 'ld':
+                    continue
+                if letter in 'rR':
+                    color = PieceColor.RED.value
+                else:
+                    color = PieceColor.BLACK.value
+                piece = Piece(color, square, self.__size, self.__zobrist)
+                self.__players[color].add_piece(piece)
+                square.add_piece(piece)
+                if letter.isupper():
+                    piece.is_king = True
+                    self.__zobrist.toggle(color, False, (i, j))
+                    self.__zobrist.toggle(color, True, (i, j))
+        if turn != self.__turn:
+            self.__end_turn()
+        self.__find_mobile()
+        self.__start_history()
+
+    def clone(self):
+        '''
+        Returns an independent copy of the board, for example to play a game
+        out without touching this one. This is cheaper than building a new
+        board and loading the position into it.
+
+        Returns: CheckerBoard: the copy
+        '''
+        copy = CheckerBoard.__new__(CheckerBoard)
+        copy.__size = self.__size
+        copy.__players = {PieceColor.RED.value : Side('RED'), \
+            PieceColor.BLACK.value : Side('BLACK')}
+        copy.__zobrist = Zobrist(self.__size)
+        copy.create_board()
+        copy.__mobile = {color: set() for color in self.__players}
+        for color, player in self.__players.items():
+            for piece in player.pieces:
+                row, col = piece.return_loc()
+                square = copy.__board[row][col]
+                twin = Piece(color, square, self.__size, copy.__zobrist)
+                twin.is_king = piece.is_king
+                copy.__players[color].add_piece(twin)
+                square.add_piece(twin)
+                if piece in self.__mobile[color]:
+                    copy.__mobile[color].add(twin)
+        copy.__zobrist.key = self.__zobrist.key
+        copy.__turn = self.__turn
+        # the cached results only refer to locations and are never modified,
+        # so they can be shared
+        copy.__legal_cache = dict(self.__legal_cache)
+        copy.__touched = set(self.__touched)
+        copy.__start = None
+        copy.__draw_plies = self.__draw_plies
+        copy.__history = list(self.__history)
+        copy.__seen = dict(self.__seen)
+        copy.__progress = self.__progress
+        return copy
+
     def print_board(self):
         '''
         Prints the board for display in terminal.
@@ -188,9 +373,30 @@ class CheckerBoard:
 
         Returns: set(tuple(int)): a set of locations of moveable pieces
         '''
-        if player in self.__players:
-            return self.__players[player].get_moveable_pieces()
-        raise ValueError
+        return {loc for loc, _ in self.legal_moves(player)}
+
+    def legal_moves(self, player):
+        '''
+        Get every legal move of the specified player, applying the forced
+        capture rule. The list is computed once per position and shared by
+        later calls, so it must not be modified.
+
+        Args:
+            player (PieceColor.COLOR.value): the player to move
+
+        Raises:
+            ValueError if player is not valid
+
+        Returns: list[tuple(tuple(int), list[tuple(int)])]: the location of
+            each moveable piece with one path it can take, ordered by location
+        '''
+        if player not in self.__players:
+            raise ValueError
+        cached = self.__legal_cache.get(player)
+        if cached is None or cached[0] != self.__zobrist.key:
+            cached = (self.__zobrist.key, self.__players[player].legal_moves())
+            self.__legal_cache[player] = cached
+        return cached[1]
 
     def possible_moves(self, loc):
         '''
@@ -238,8 +444,13 @@ class CheckerBoard:
 
         # move to position
         row, col = final_loc
+        was_king = piece.is_king
         #piece.move(self.__board[row][col])
         piece.step(self.__board[row][col], 'MOVE')
+        self.__touched.update((tuple(initial_loc), tuple(final_loc)))
+        if piece.is_king != was_king:
+            self.__progress = True
+        self.__end_turn()
 
     def possible_jumps(self, loc):
         '''
@@ -266,18 +477,46 @@ class CheckerBoard:
         possibles =  piece.get_possible_jumps()
         return possibles
 
-    def one_jump(self, loc, step): 
+    def jump_tree(self, loc):
+        '''
+        get all possible jumps of the specified piece as a jump tree (see
+        logic.jumptree), which stores shared first steps only once
+
+        Args:
+            loc (tuple(int)): the location of the selected piece
+
+        Raises:
+            ValueError if location specified is not valid
+
+        Returns:
+            tree (dict{tuple(int) : dict}): maps each first landing square to
+                the tree of the jumps that may follow it
+        '''
+        row, col = loc
+        try:
+            piece = self.__board[row][col].occupied_by
+            return piece.get_jump_tree()
+        except:
+            raise ValueError
+
+    def one_jump(self, loc, step, last = None): 
         '''
         One step jump from loc to step.
 
         Caution: this function does not check if this jump is valid within a
         sequence of moves. For a complete sequence of jumps with validity 
         checks, use self.jump(). This function should only be used to loop
-        through a sequence of jumps returned by possible jumps. 
+        through a sequence of jumps returned by possible jumps. The turn
+        passes to the other player once the piece cannot jump any further.
 
         Args: 
             loc (tuple of int): location of the piece to be jumped
             step (tuple of int): location the piece is to be jumped to
+            last (bool): whether this is the last hop of the jump, as told
+                by the jump tree of the piece. The tree counts the square
+                the jump started from as taken, so a king looping back
+                through it may have to stop where the board alone would
+                let it jump on. If None, the board decides
 
         Raises:
             ValueError if move is invalid.
@@ -289,10 +528,17 @@ class CheckerBoard:
         # jump to location
         row1, col1 = step
         desti = self.__board[row1][col1]
+        was_king = piece.is_king
         piece.step(desti, 'JUMP')
         removed = self.__board[int((row + row1) / \
             2)][int((col + col1)/2)].occupied_by
         self.__remove_piece(removed.return_loc())
+        self.__touched.update((tuple(loc), tuple(step)))
+        # a piece that has just been kinged stops jumping
+        if last is None:
+            last = piece.is_king != was_king or not piece.can_jump()
+        if last:
+            self.__end_turn()
 
     def jump(self, loc, steps): 
         '''
@@ -326,26 +572,233 @@ class CheckerBoard:
                 removed = self.__board[int((row + row1) / \
                     2)][int((col + col1)/2)].occupied_by
                 self.__remove_piece(removed.return_loc())
-
+            self.__touched.add(tuple(loc))
+            self.__touched.update(tuple(step) for step in steps)
+            self.__end_turn()
         else:
             raise ValueError
 
+    def make_move(self, loc, steps):
+        '''
+        Play a move so that it can be taken back with unmake_move(). Pieces
+        captured on the way leave the board and their side, but are kept in
+        the returned token.
+
+        Caution: this function does not check if the move is valid. It should
+        only be used with moves returned by possible_moves().
+
+        Args:
+            loc (tuple of int): location of the piece to be moved
+            steps list[tuple of int]: list of locations for each step of the
+                move
+
+        Returns: tuple: undo token to pass to unmake_move()
+        '''
+        row, col = loc
+        piece = self.__board[row][col].occupied_by
+        token = (piece, piece.square, piece.is_king, [], self.__zobrist.key)
+        self.__apply(piece, loc, steps, token[3])
+        return token
+
+    def apply_move(self, loc, steps):
+        '''
+        Play a move without checking it. This is the fast path for callers
+        that took the move from legal_moves() or possible_moves() of the
+        current position, such as bots, simulations and replays. Use play()
+        for moves that may be invalid.
+
+        Args:
+            loc (tuple of int): location of the piece to be moved
+            steps list[tuple of int]: list of locations for each step of the
+                move
+        '''
+        row, col = loc
+        self.__apply(self.__board[row][col].occupied_by, loc, steps, None)
+
+    def __apply(self, piece, loc, steps, captured):
+        '''
+        Moves a piece through a series of steps, removing the pieces it jumps
+        over, and passes the turn
+
+        Args:
+            piece (Piece): the piece to be moved
+            loc (tuple of int): location of the piece
+            steps list[tuple of int]: list of locations for each step
+            captured (list[Piece]): list the removed pieces are added to, or
+                None
+        '''
+        row, col = loc
+        was_king = piece.is_king
+        touched = self.__touched
+        touched.add((row, col))
+        for row1, col1 in steps:
+            if abs(row1 - row) == 2:
+                removed = self.__board[(row + row1) // 2][(col + col1) // 2]
+                if captured is not None:
+                    captured.append(removed.occupied_by)
+                self.__remove_piece(removed.return_loc())
+            piece.relocate(self.__board[row1][col1])
+            touched.add((row1, col1))
+            row, col = row1, col1
+        if piece.is_king != was_king:
+            self.__progress = True
+        self.__end_turn()
+
+    def unmake_move(self, token):
+        '''
+        Take back a move played by make_move(). Moves must be taken back in
+        the reverse order they were made.
+
+        Args:
+            token (tuple): the undo token returned by make_move()
+        '''
+        piece, square, was_king, captured, key = token
+        touched = self.__touched
+        touched.add((piece.square.row, piece.square.col))
+        touched.add((square.row, square.col))
+        piece.square.empty()
+        piece.square = square
+        square.add_piece(piece)
+        piece.is_king = was_king
+        for removed in captured:
+            removed.square.add_piece(removed)
+            self.__players[removed.color].add_piece(removed)
+            touched.add((removed.square.row, removed.square.col))
+        self.__zobrist.key = key
+        self.__turn = piece.color
+        key, _ = self.__history.pop()
+        self.__seen[key] -= 1
+        if not self.__seen[key]:
+            del self.__seen[key]
+
+    def __end_turn(self):
+        '''
+        Passes the turn to the other player and adds the position reached to
+        the history
+        '''
+        if self.__turn == PieceColor.RED.value:
+            self.__turn = PieceColor.BLACK.value
+        else:
+            self.__turn = PieceColor.RED.value
+        self.__zobrist.toggle_side()
+        key = self.__zobrist.key
+        quiet = 0 if self.__progress else self.__history[-1][1] + 1
+        self.__progress = False
+        self.__history.append((key, quiet))
+        self.__seen[key] = self.__seen.get(key, 0) + 1
+
+    def get_turn(self):
+        '''
+        Returns the player to move (PieceColor.COLOR.value)
+        '''
+        return self.__turn
+
+    def get_hash(self):
+        '''
+        Returns the 64-bit Zobrist key of the position and the player to move
+        (int). It is updated as moves are played, so it costs nothing to read.
+        '''
+        return self.__zobrist.key
+
     def game_ended(self):
         '''
         Return the winner if the game has been won
         
+        A game that could go on is drawn once a position is reached for the
+        third time, or after draw_plies plies without a capture or a
+        promotion. The pieces that can move are kept track of as moves are
+        played, so only those around the last moves are looked at.
+
         Returns: str: whether someone has win 
         Possible returns: DRAW, BLACK WINS, RED WINS, CONTINUE
         '''
+        if self.__touched:
+            self.__update_mobile()
         # possibly replace this string flag with a better flag
-        if not self.__players[PieceColor.RED.value].movable():
-            if not self.__players[PieceColor.BLACK.value].movable():
+        if not self.__mobile[RED]:
+            if not self.__mobile[BLACK]:
                 return 'DRAW'
             return 'BLACK WINS'
-        elif not self.__players[PieceColor.BLACK.value].movable():
+        if not self.__mobile[BLACK]:
             return 'RED WINS'
+        # the draw rules depend on the history, not only on the position
+        if self.drawn_by_rule():
+            return 'DRAW'
         return 'CONTINUE'
 
+    def drawn_by_rule(self):
+        '''
+        Returns whether the position has been reached for the third time, or
+        draw_plies plies have been played without a capture or a promotion
+        (bool). game_ended() only draws such a game if both players can
+        still move.
+        '''
+        return self.__seen.get(self.__zobrist.key, 0) >= 3 or \
+            self.__draw_plies is not None and \
+            self.__history[-1][1] >= self.__draw_plies
+
+    def get_quiet_plies(self):
+        '''
+        Returns the number of plies played since the last capture or
+        promotion (int)
+        '''
+        return self.__history[-1][1]
+
+    def get_draw_plies(self):
+        '''
+        Returns the number of plies without a capture or a promotion that
+        draws the game, or None if there is no limit
+        '''
+        return self.__draw_plies
+
+    def __find_mobile(self):
+        '''
+        Finds the pieces of each player that can move or jump, going over
+        every piece
+        '''
+        #__mobile : player -> the pieces of the player that can move or jump
+        self.__mobile = {color: {piece for piece in side.pieces if \
+            _can_go(piece)} for color, side in self.__players.items()}
+        #__touched : the locations moves have emptied or filled since
+        #   __mobile was last brought up to date
+        self.__touched = set()
+
+    def __update_mobile(self):
+        '''
+        Brings the pieces that can move or jump up to date with the moves
+        played since the last update. A move only changes whether a piece can
+        go anywhere if the piece stands on a square the move emptied or
+        filled, or within a jump of one, so only these pieces are looked at.
+        '''
+        board = self.__board
+        near = set()
+        for row, col in self.__touched:
+            square = board[row][col]
+            near.add(square)
+            near.update(square.connected.values())
+            near.update(square.landing.values())
+        near.discard(None)
+        self.__touched.clear()
+        for square in near:
+            piece = square.occupied_by
+            if piece is None:
+                continue
+            if _can_go(piece):
+                self.__mobile[piece.color].add(piece)
+            else:
+                self.__mobile[piece.color].discard(piece)
+
+    def get_piece_count(self, player):
+        '''
+        Returns the number of pieces a player has left (int)
+
+        Raises:
+            ValueError if player is not valid
+        '''
+        if player not in self.__players:
+            raise ValueError
+        return len(self.__players[player].pieces)
+
     def __remove_piece(self, loc):
         '''
         Remove a piece from the board
@@ -359,7 +812,11 @@ class CheckerBoard:
         row, col = loc
         piece = self.__board[row][col].occupied_by
         self.__players[piece.color].remove_piece(piece)
+        self.__mobile[piece.color].discard(piece)
+        self.__touched.add((row, col))
+        self.__zobrist.toggle(piece.color, piece.is_king, loc)
         self.__board[row][col].empty()
+        self.__progress = True
 
     def get_board_size(self):
         '''
@@ -409,14 +866,36 @@ class CheckerBoard:
         row, col = loc
         piece = self.__board[row][col].occupied_by
         
+        # the move set is enumerated once; once the move is found in it, it
+        # is applied without checking each step again
         jumps = piece.get_possible_jumps()
         if jumps != []:
-            self.jump(loc, steps)
+            if steps not in jumps:
+                raise ValueError
         else:
-            if len(steps) == 1:
-                self.move(loc, steps[0])
-            else:
+            if len(steps) != 1 or tuple(steps[0]) not in \
+                [move[0] for move in piece.get_possible_moves()]:
                 raise ValueError
+        self.apply_move(loc, steps)
+
+def _can_go(piece):
+    '''
+    Returns whether a piece can move or jump (bool), as Piece.can_move() or
+    Piece.can_jump() would tell, in a single pass over its directions
+    '''
+    square = piece.square
+    for dire in MOVE_DIRS[piece.color, piece.is_king]:
+        over = square.connected[dire]
+        if over is None:
+            continue
+        occupant = over.occupied_by
+        if occupant is None:
+            return True
+        if occupant.color != piece.color:
+            land = square.landing[dire]
+            if land is not None and land.occupied_by is None:
+                return True
+    return False
 
 class Square:
     '''
@@ -427,7 +906,12 @@ class Square:
     connected: dict{str : Square}: a dict mapping directions (up_left, down_left
     up_right, down_right) to the square on that direction. None if connection
     does not exist (because there is no square on that direction)
+    landing: dict{str : Square}: a dict mapping directions to the square two
+    steps away, where a jump in that direction lands. None if it does not exist
+    Light squares, which pieces never reach, are not connected.
     '''
+    __slots__ = ('row', 'col', 'connected', 'landing', 'occupied_by', '__type')
+
     def __init__(self, loc, color):
         '''
         Constructor 
@@ -439,8 +923,8 @@ class Square:
             occupied_by: the piece occuping the square
         '''
         self.row, self.col = loc   
-        self.connected = {key: None for key in ['up_left', 'down_left',\
-             'up_right', 'down_right']}  
+        self.connected = NOT_CONNECTED
+        self.landing = NOT_CONNECTED
         self.occupied_by = None
         # the type of the square
         self.__type = color
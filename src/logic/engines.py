@@ -0,0 +1,79 @@
+'''
+Registry of the board engines the frontends can choose from. Every engine
+exposes the public surface of CheckerBoard.
+'''
+from logic.board import CheckerBoard
+from logic.bitboard import BitboardCheckerBoard
+
+ENGINES = {
+    'object': CheckerBoard,
+    'bitboard': BitboardCheckerBoard,
+}
+
+def new_board(n = 3, engine = 'object', draw_plies = None):
+    '''
+    Creates a board using the chosen engine
+
+    Args:
+        n (int): the number of rows of pieces for each player
+        engine (str): name of the engine, one of ENGINES
+        draw_plies (int): the game is drawn after this many plies in a row
+            without a capture or a promotion, None for no limit
+
+    Raises:
+        ValueError if the engine is unknown
+
+    Returns: a new board at the start position
+    '''
+    if engine not in ENGINES:
+        raise ValueError
+    return ENGINES[engine](n, draw_plies)
+
+class BoardPool:
+    '''
+    Boards kept for reuse, so that a series of games (a simulation, or a
+    server running many games) does not build a new board for each one.
+    Boards handed out are reset to the start position.
+    '''
+
+    def __init__(self):
+        '''
+        Constructor
+        '''
+        #__free : (engine class, board size, draw_plies) -> boards ready to
+        #   be reused
+        self.__free = {}
+
+    def acquire(self, n = 3, engine = 'object', draw_plies = None):
+        '''
+        Returns a board at the start position, reusing a released one if
+        there is one
+
+        Args:
+            n (int): the number of rows of pieces for each player
+            engine (str): name of the engine, one of ENGINES
+            draw_plies (int): see new_board()
+
+        Raises:
+            ValueError if the engine is unknown
+        '''
+        if engine not in ENGINES:
+            raise ValueError
+        boards = self.__free.get((ENGINES[engine], 2 * n + 2, draw_plies))
+        if not boards:
+            return new_board(n, engine, draw_plies)
+        board = boards.pop()
+        board.reset()
+        return board
+
+    def release(self, board):
+        '''
+        Gives a board back to the pool once its game is over. The board must
+        not be used afterwards, as it may be handed out again.
+
+        Args:
+            board (CheckerBoard): a board of any engine
+        '''
+        key = (type(board), board.get_board_size()[0],
+            board.get_draw_plies())
+        self.__free.setdefault(key, []).append(board)
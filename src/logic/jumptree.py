@@ -0,0 +1,34 @@
+'''
+Helpers for jump trees, the compact form of a piece's jump options returned by
+jump_tree() on the boards. A jump tree is a dict mapping each landing square
+(row, col) of the next hop to the tree of the hops that may follow it; a hop
+that ends the jump maps to an empty dict. Paths that share their first hops
+share those nodes, and children are kept in the order possible_moves() lists
+the paths.
+'''
+
+def iter_paths(tree):
+    '''
+    Lazily expands a jump tree into full jump paths, in the order
+    possible_moves() returns them.
+
+    Args:
+        tree (dict): the jump tree to expand
+
+    Yields:
+        list[tuple(int, int)]: a jump path, as the locations of its steps
+    '''
+    stack = [iter(tree.items())]
+    path = []
+    while stack:
+        for loc, subtree in stack[-1]:
+            path.append(loc)
+            if subtree:
+                stack.append(iter(subtree.items()))
+                break
+            yield list(path)
+            path.pop()
+        else:
+            stack.pop()
+            if path:
+                path.pop()
@@ -11,14 +11,18 @@ class Piece:
     square (Square): the square the piece is in
     is_king(bool): whether the piece is king
     board_size (int): the overall size of the board
+    zobrist (Zobrist): the position key of the board, updated as the piece
+        moves and turns king, or None
 
     '''
+    __slots__ = ('color', 'square', 'is_king', 'board_size', 'zobrist')
+
     # these are the directions that can be explore going up/down
     UP_DIRS = ['up_left', 'up_right']
     DOWN_DIRS = ['down_left', 'down_right']
     ALL_DIRS = UP_DIRS + DOWN_DIRS
 
-    def __init__(self, color, square, board_size):
+    def __init__(self, color, square, board_size, zobrist = None):
         '''
         Constructor
         Initializes each piece
@@ -27,11 +31,15 @@ class Piece:
         color[PieceColor.COLOR.value]: the color of the piece
         square[Square]: the square the color is in
         board_size[int]: the size of the board
+        zobrist[Zobrist]: the position key to keep up to date, if any
         '''
         self.color = color
         self.square = square
         self.is_king = False
         self.board_size = board_size
+        self.zobrist = zobrist
+        if zobrist:
+            zobrist.toggle(color, False, square.return_loc())
     
     def return_loc(self):
         '''
@@ -77,39 +85,120 @@ class Piece:
         List[List[tuple of int]]: a list of possible jump path, each consisting
             of a list of locations of steps in the jump
         '''
-        return self.__possible_many_jumps(self.square)
+        return list(self.iter_jumps())
 
-    def __possible_many_jumps(self, start_square, passed = []):
+    def iter_jumps(self):
         '''
-        Returns the possible jumps of this piece. This is helper function to be
-        recursed over.
-        
-        Args:
-            passed (list [tuple of ints]): the pieaces already jumped over
+        Yields the possible jump paths of this piece one at a time, in the
+        same order as get_possible_jumps(). The jump tree is walked depth first
+        with an explicit stack, and the pieces already jumped over are kept as
+        a bitmask of square numbers (row * board_size + col).
 
-        Returns:
-        List[List[tuple of int]]: a list of possible jump path, each consisting
-            of a list of locations of steps in the jump
+        Yields:
+        List[tuple of int]: a jump path, as the locations of its steps
         '''
-        jumps = []
-        for possible in self.__possible_one_jump(start_square, passed):
-            row, col = possible.return_loc()
-            if (row, col) not in passed:
+        opponent, dirs = self.__jump_dirs()
+        last_row = self.board_size - 1
+        # each frame is [square, squares jumped over, next direction, whether
+        # a further jump was found]; path holds the landing of every frame
+        # but the first
+        stack = [[self.square, 0, 0, False]]
+        path = []
+        while stack:
+            frame = stack[-1]
+            square, passed, i, extended = frame
+            if i == len(dirs):
+                stack.pop()
+                # if there are no further jumps possible, stop at this jump
+                if path:
+                    if not extended:
+                        yield list(path)
+                    path.pop()
+                continue
+            frame[2] = i + 1
+            desti = square.landing[dirs[i]]
+            if desti is None or desti.occupied_by is not None:
+                continue
+            over = square.connected[dirs[i]]
+            if over.occupied_by is None or over.occupied_by.color != opponent:
+                continue
+            bit = 1 << (over.row * self.board_size + over.col)
+            if passed & bit:
+                continue
+            frame[3] = True
+            path.append(desti.return_loc())
+            # if it is kinged at this step, stop at this jump
+            if not self.is_king and desti.row in (0, last_row):
+                yield list(path)
+                path.pop()
+            else:
+                stack.append([desti, passed | bit, 0, False])
+
+    def get_jump_tree(self):
+        '''
+        Returns the possible jumps of this piece as a jump tree (see
+        logic.jumptree): each landing square maps to the jumps that may follow
+        it, so jumps sharing their first steps are stored only once.
+
+        Return:
+        dict{tuple of int : dict}: the jump tree, empty if the piece cannot
+            jump
+        '''
+        opponent, dirs = self.__jump_dirs()
+        last_row = self.board_size - 1
+        tree = {}
+        stack = [(self.square, 0, tree)]
+        while stack:
+            square, passed, node = stack.pop()
+            for dire in dirs:
+                desti = square.landing[dire]
+                if desti is None or desti.occupied_by is not None:
+                    continue
+                over = square.connected[dire]
+                if over.occupied_by is None or \
+                    over.occupied_by.color != opponent:
+                    continue
+                bit = 1 << (over.row * self.board_size + over.col)
+                if passed & bit:
+                    continue
+                child = node[desti.return_loc()] = {}
                 # if it is kinged at this step, stop at this jump
-                if not self.is_king and possible.return_loc()[0] in \
-                    [0, self.board_size - 1]:
-                    jumps.append([possible.return_loc()])
-                else:
-                    i, j = start_square.return_loc()
-                    further_jumps = self.__possible_many_jumps(possible, passed\
-                        + [(int((i+row)/2), int((j+col)/2))])
-                    # if there are no further jumps possible, stop at this jump
-                    if not further_jumps:
-                        jumps.append([possible.return_loc()])
-                    else:
-                        jumps = jumps + [([possible.return_loc()] + steps ) for\
-                            steps in further_jumps]
-        return jumps
+                if self.is_king or desti.row not in (0, last_row):
+                    stack.append((desti, passed | bit, child))
+        return tree
+
+    def __jump_dirs(self):
+        '''
+        Returns the opponent color and the directions this piece may jump in,
+        forward first
+        '''
+        if self.color == PieceColor.RED.value:
+            return PieceColor.BLACK.value, Piece.DOWN_DIRS + Piece.UP_DIRS \
+                if self.is_king else Piece.DOWN_DIRS
+        return PieceColor.RED.value, Piece.UP_DIRS + Piece.DOWN_DIRS \
+            if self.is_king else Piece.UP_DIRS
+
+    def can_move(self):
+        '''
+        Returns whether the piece can make at least one diagonal move (bool)
+        '''
+        if self.is_king:
+            dirs = Piece.ALL_DIRS
+        elif self.color == PieceColor.RED.value:
+            dirs = Piece.DOWN_DIRS
+        else:
+            dirs = Piece.UP_DIRS
+        for dire in dirs:
+            neighbour = self.square.connected[dire]
+            if neighbour and not neighbour.occupied_by:
+                return True
+        return False
+
+    def can_jump(self):
+        '''
+        Returns whether the piece can make at least one jump (bool)
+        '''
+        return self.__possible_one_jump(self.square) != []
 
     def __possible_one_jump(self,  start_square, passed = []):
         '''
@@ -132,19 +221,19 @@ class Piece:
         if self.color == PieceColor.RED.value:
             for dire in Piece.DOWN_DIRS:
                 if self.__test_dire(start_square, dire, opponent, passed):
-                    jumps.append(start_square.connected[dire].connected[dire])          
+                    jumps.append(start_square.landing[dire])          
             if self.is_king:
                 for dire in Piece.UP_DIRS:
                     if self.__test_dire(start_square, dire, opponent, passed):
-                        jumps.append(start_square.connected[dire].connected[dire])   
+                        jumps.append(start_square.landing[dire])   
         else:
             for dire in Piece.UP_DIRS:
                 if self.__test_dire(start_square, dire, opponent, passed):
-                    jumps.append(start_square.connected[dire].connected[dire])          
+                    jumps.append(start_square.landing[dire])          
             if self.is_king:
                 for dire in Piece.DOWN_DIRS:
                     if self.__test_dire(start_square, dire, opponent, passed):
-                        jumps.append(start_square.connected[dire].connected[dire])
+                        jumps.append(start_square.landing[dire])
 
         return jumps       
 
@@ -160,12 +249,10 @@ class Piece:
         
         Return: bool: if the direction is valid for jumping
         '''
-        if start_square.connected[dire] and \
-            start_square.connected[dire].connected[dire] and \
+        if start_square.landing[dire] and \
             start_square.connected[dire].occupied_by and \
             start_square.connected[dire].occupied_by.color == opponent and \
-            not start_square.connected[dire].connected[dire].occupied_by:
-            row, col = start_square.connected[dire].connected[dire].return_loc()
+            not start_square.landing[dire].occupied_by:
             return start_square.connected[dire].return_loc() not in passed
         return False
 
@@ -192,14 +279,29 @@ class Piece:
             raise ValueError
         
         if desti.return_loc() in possible:
-            self.square.empty()
-            self.square = desti
-            desti.add_piece(self)
-            if desti.return_loc()[0] in [0, self.board_size - 1]:
-                self.__turns_king()
+            self.relocate(desti)
         else:
             raise ValueError
 
+    def relocate(self, desti):
+        '''
+        Move to a new location without checking that the step is valid. The
+        piece turns king if it reaches the first or last row.
+
+        Args:
+            desti(Square): new location of the piece
+
+        Return: None
+        '''
+        if self.zobrist:
+            self.zobrist.toggle(self.color, self.is_king, self.return_loc())
+            self.zobrist.toggle(self.color, self.is_king, desti.return_loc())
+        self.square.empty()
+        self.square = desti
+        desti.add_piece(self)
+        if desti.return_loc()[0] in [0, self.board_size - 1]:
+            self.__turns_king()
+
     def __turns_king(self):
         '''
         Updates the status of the piece to become a king if it is not already
@@ -209,4 +311,8 @@ class Piece:
         '''
         if not self.is_king:
             self.is_king = True
+            if self.zobrist:
+                loc = self.return_loc()
+                self.zobrist.toggle(self.color, False, loc)
+                self.zobrist.toggle(self.color, True, loc)
 
@@ -6,6 +6,7 @@ class Side:
 	Color (str): color representing this side
 	pieces (set): set of pieces this side have
 	'''
+	__slots__ = ('color', 'pieces')
 	
 	def __init__(self, color):
 		'''
@@ -17,6 +18,29 @@ class Side:
 		self.color = color
 		self.pieces = set()
 
+	def legal_moves(self):
+		'''
+		Get every move the player can make in a single pass over the pieces.
+		If the player can jump, only the jumps are returned.
+
+		Returns:
+			list[tuple(tuple(row, column), list[tuple(row, column)])]: the
+				location of a moveable piece together with one path it can
+				take, ordered by location. Empty if the player cannot move.
+		'''
+		pieces = sorted(self.pieces, key=lambda piece: piece.return_loc())
+		# get all jumps
+		moves = [(piece.return_loc(), path) for piece in pieces
+			for path in piece.get_possible_jumps()]
+
+		# there are jumps, return those
+		if moves:
+			return moves
+
+		# if not jumpable, get all the diagonal moves
+		return [(piece.return_loc(), path) for piece in pieces
+			for path in piece.get_possible_moves()]
+
 	def get_moveable_pieces(self):
 		'''
 		If the player can jump, return all jumpable pieces. If not, return all
@@ -26,22 +50,7 @@ class Side:
 			set[tuple(row, column)]: set of location of pieces that are 
 				moveable. Returns empty list if there is no movable piece.
 		'''
-		# get all jumpable pieces
-		movable_pieces = set()
-		for piece in self.pieces:
-			if piece.get_possible_jumps() != []:
-				movable_pieces.add(piece.return_loc())
-
-		# there are jumpable pieces, return those
-		if len(movable_pieces) != 0:
-			return movable_pieces
-
-		# if not jumpable, get all pieces that can move diagonally and return
-		# those
-		for piece in self.pieces:
-			if piece.get_possible_moves() != []:
-				movable_pieces.add(piece.return_loc())
-		return movable_pieces
+		return {loc for loc, _ in self.legal_moves()}
 
 	def movable(self):
 		'''
@@ -50,7 +59,12 @@ class Side:
 		Returns:
 			Bool: whether the player can still move
 		'''
-		return len(self.get_moveable_pieces()) != 0
+		# stop at the first piece that can go anywhere, instead of listing
+		# every move of every piece
+		for piece in self.pieces:
+			if piece.can_move() or piece.can_jump():
+				return True
+		return False
 	
 	def jumpable(self):
 		'''
@@ -60,8 +74,8 @@ class Side:
 			Bool: whether the player can still jump
 		'''
 		# loop through each piece and test if they can jump
-		for piece in self.self.pieces:
-			if piece.get_possible_jumps() is not None:
+		for piece in self.pieces:
+			if piece.can_jump():
 				return True
 		return False
 	
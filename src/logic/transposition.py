@@ -0,0 +1,135 @@
+from array import array
+
+# bound types of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# layout of the packed data word of an entry, from the low bits up:
+# score + SCORE_OFFSET (32 bits), depth (8 bits), bound (2 bits) and
+# best move index + 1 (16 bits, 0 for no move)
+SCORE_OFFSET = 1 << 31
+DEPTH_SHIFT = 32
+BOUND_SHIFT = 40
+MOVE_SHIFT = 42
+
+class TranspositionTable:
+    '''
+    A fixed-size table of search results keyed by the 64-bit hash of a
+    position (see CheckerBoard.get_hash()).
+
+    Entries live in two preallocated arrays, one for the keys and one for the
+    packed data, grouped in buckets of two slots: the first slot keeps the
+    deepest result seen for the bucket, the second is overwritten by every
+    result that isn't deep enough for the first, and by the result the
+    first one held when a deeper one takes its place.
+
+    Public Attributes:
+    entries (int): the number of entries the table holds
+    probes (int): the number of calls to probe()
+    hits (int): the number of probes that found their position
+    stores (int): the number of calls to store()
+    used (int): the number of slots holding an entry
+    '''
+    DEFAULT_ENTRIES = 1 << 16
+
+    def __init__(self, entries=DEFAULT_ENTRIES):
+        '''
+        Constructor
+
+        Args:
+            entries (int): the number of entries to hold, rounded up to an
+                           even number; the table takes 16 bytes per entry
+
+        Raises:
+            ValueError if entries is not positive
+        '''
+        if entries < 1:
+            raise ValueError
+        self.__buckets = (entries + 1) // 2
+        self.entries = 2 * self.__buckets
+        self.__keys = array('Q', [0]) * self.entries
+        self.__data = array('Q', [0]) * self.entries
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.used = 0
+
+    def probe(self, key):
+        '''
+        Looks up a position
+
+        Args:
+            key (int): the hash of the position
+
+        Returns:
+            (int, int, int, int) or None: the depth, bound type, score and
+                index of the best move in legal_moves() (-1 if none) stored
+                for the position, or None if it isn't in the table
+        '''
+        self.probes += 1
+        slot = (key % self.__buckets) * 2
+        if self.__keys[slot] != key or not self.__data[slot]:
+            slot += 1
+            if self.__keys[slot] != key or not self.__data[slot]:
+                return None
+        self.hits += 1
+        data = self.__data[slot]
+        return ((data >> DEPTH_SHIFT) & 0xff, (data >> BOUND_SHIFT) & 0x3,
+                (data & 0xffffffff) - SCORE_OFFSET,
+                (data >> MOVE_SHIFT) - 1)
+
+    def store(self, key, depth, bound, score, move=-1):
+        '''
+        Stores the result of a search
+
+        Args:
+            key (int): the hash of the position
+            depth (int): the depth the position was searched to, 0 to 255
+            bound (int): EXACT, LOWER or UPPER
+            score (int): the score found
+            move (int): the index of the best move in legal_moves(), or -1
+        '''
+        self.stores += 1
+        data = (score + SCORE_OFFSET) | (depth << DEPTH_SHIFT) | \
+            (bound << BOUND_SHIFT) | ((move + 1) << MOVE_SHIFT)
+        slot = (key % self.__buckets) * 2
+        kept = self.__data[slot]
+        if kept and self.__keys[slot] != key:
+            if depth < (kept >> DEPTH_SHIFT) & 0xff:
+                # not deep enough to take the place of the kept entry
+                slot += 1
+            else:
+                # the entry it takes the place of moves to the second slot,
+                # over any older entry of the position stored
+                if not self.__data[slot + 1]:
+                    self.used += 1
+                self.__keys[slot + 1] = self.__keys[slot]
+                self.__data[slot + 1] = kept
+        if not self.__data[slot]:
+            self.used += 1
+        self.__keys[slot] = key
+        self.__data[slot] = data
+
+    def clear(self):
+        '''
+        Empties the table and resets its statistics
+        '''
+        self.__keys = array('Q', [0]) * self.entries
+        self.__data = array('Q', [0]) * self.entries
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.used = 0
+
+    def hit_rate(self):
+        '''
+        Returns: float: the share of probes that found their position
+        '''
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill(self):
+        '''
+        Returns: float: the share of the entries in use
+        '''
+        return self.used / self.entries
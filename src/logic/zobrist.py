@@ -0,0 +1,74 @@
+import random
+
+# the keys are drawn from a fixed seed so that the hash of a position is the
+# same in every process and every run, and for every board engine
+SEED = 20240229
+SIDE_KEY = random.Random(SEED).getrandbits(64)
+
+_KEYS = {}
+
+def get_keys(size):
+    '''
+    Returns the Zobrist keys of a board size, building them on first use.
+
+    Args:
+        size (int): the number of rows (and columns) of the board
+
+    Returns: list[list[int]]: for each piece kind (see kind()), a random
+        64-bit key for every square, indexed by row * size + col
+    '''
+    keys = _KEYS.get(size)
+    if keys is None:
+        rng = random.Random(SEED + size)
+        keys = _KEYS[size] = [[rng.getrandbits(64) for _ in range(size *
+            size)] for _ in range(4)]
+    return keys
+
+def kind(color, is_king):
+    '''
+    Returns the index of a piece kind in the key table
+
+    Args:
+        color (PieceColor.COLOR.value): the color of the piece
+        is_king (bool): whether the piece is king
+    '''
+    return (color - 1) * 2 + int(is_king)
+
+
+class Zobrist:
+    '''
+    A 64-bit position key, updated in place as pieces move, get captured or
+    turn king, and as the side to move changes.
+
+    Public Attributes:
+    key (int): the current key of the position
+    '''
+
+    def __init__(self, size):
+        '''
+        Constructor
+
+        Args:
+            size (int): the number of rows (and columns) of the board
+        '''
+        self.__size = size
+        self.__keys = get_keys(size)
+        self.key = 0
+
+    def toggle(self, color, is_king, loc):
+        '''
+        Adds a piece on a square to the key, or removes it if it was there
+
+        Args:
+            color (PieceColor.COLOR.value): the color of the piece
+            is_king (bool): whether the piece is king
+            loc (tuple(int, int)): the location of the piece
+        '''
+        row, col = loc
+        self.key ^= self.__keys[kind(color, is_king)][row * self.__size + col]
+
+    def toggle_side(self):
+        '''
+        Switches the side to move in the key
+        '''
+        self.key ^= SIDE_KEY
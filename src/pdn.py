@@ -0,0 +1,315 @@
+'''
+Portable Draughts Notation (PDN): writes games as PDN text and reads PDN
+collections one game at a time, feeding the moves back into a board.
+
+Squares are numbered from 1, row by row from the top of the board, counting
+only the dark squares (1 to 32 on an 8x8 board, as in English checkers). RED
+moves first from the top of the board, so it is the side PDN calls Black,
+and BLACK is White. Results are given from RED's side first: 1-0 when RED
+wins, 0-1 when BLACK wins, 1/2-1/2 for a draw and * for a game not over.
+Boards other than 8x8 have their width and height in the GameType tag,
+e.g. [GameType "21,B,10,10,N2,0"].
+'''
+import re
+import sys
+import time
+
+import click
+
+sys.path.append("./logic")
+import archive
+from archive import GameWriter, read_games
+from bitboard import BLACK, RED
+from engines import ENGINES, new_board
+
+RESULTS = {"RED": "1-0", "BLACK": "0-1", "DRAW": "1/2-1/2", None: "*"}
+# results read from other programs, some of which score a win 2 points
+WINNERS = {"1-0": "RED", "2-0": "RED", "0-1": "BLACK", "0-2": "BLACK",
+           "1/2-1/2": "DRAW", "1-1": "DRAW", "*": None}
+GAME_TYPE = 21
+
+# tags, comments, variations, results, move numbers, moves, then anything
+# else (annotations and the like are skipped)
+TOKENS = re.compile(r'''
+    \[\s*(?P<tag>\w+)\s+"(?P<value>(?:[^"\\]|\\.)*)"\s*\]
+  | \{[^}]*\}
+  | ;[^\n]*
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<result>(?:1/2-1/2|[012]-[012]|\*)(?![\dx:-]))
+  | \d+\.+
+  | (?P<move>\d+(?:[-x:]\d+)+)
+  | \S+?(?=[\s(){}\[\]]|$)
+''', re.VERBOSE)
+
+def square_number(size, loc):
+    '''
+    Returns: int: the PDN number of the dark square at loc on a board of
+        size rows, its number in the archives counted from 1
+    '''
+    return archive.square_number(size, loc) + 1
+
+def square_loc(size, number):
+    '''
+    Returns: tuple(int, int): the location of the dark square with a PDN
+        number on a board of size rows
+
+    Raises:
+        ValueError if the number is not on the board
+    '''
+    if not 0 < number <= size * size // 2:
+        raise ValueError
+    return archive.square_loc(size, number - 1)
+
+def move_text(size, loc, path):
+    '''
+    Returns: str: a move in PDN, with every square of a multi-jump (15x24x31)
+    '''
+    separator = "x" if abs(path[0][0] - loc[0]) == 2 else "-"
+    return separator.join(str(square_number(size, square))
+                          for square in [loc] + list(path))
+
+def game_text(moves, rows=3, winner=None, tags=None):
+    '''
+    Writes a game as PDN
+
+    Args:
+        moves (list): the (loc, path) of each move played, as given to
+                      CheckerBoard.play()
+        rows (int): the number of rows of pieces for each player
+        winner (str): RED, BLACK or DRAW, or None if the game is not over
+        tags (dict{str : str}): tags to add, e.g. {"Event": "test"}
+
+    Returns: str: the game, ending with an empty line
+    '''
+    size = 2 * rows + 2
+    header = {"Black": "RED", "White": "BLACK"}
+    header.update(tags or {})
+    header["Result"] = RESULTS[winner]
+    header["GameType"] = str(GAME_TYPE) if size == 8 else \
+        f"{GAME_TYPE},B,{size},{size},N2,0"
+    lines = [f'[{tag} "{value}"]' for tag, value in header.items()]
+    lines.append("")
+    line = ""
+    for number, (loc, path) in enumerate(moves):
+        token = move_text(size, loc, path)
+        if number % 2 == 0:
+            token = f"{number // 2 + 1}. {token}"
+        if line and len(line) + len(token) >= 79:
+            lines.append(line)
+            line = ""
+        line = f"{line} {token}" if line else token
+    token = RESULTS[winner]
+    lines.append(f"{line} {token}" if line else token)
+    return "\n".join(lines) + "\n\n"
+
+def read_pdn(file):
+    '''
+    Reads the games of a PDN collection, one at a time, without reading
+    the whole file
+
+    Args:
+        file (file object): the open text file
+
+    Raises:
+        ValueError if a game is malformed
+
+    Returns:
+        generator of dict: the "tags" of each game, its "rows" of pieces
+            for each player (from the GameType tag, 3 if not given), its
+            "winner" (see WINNERS) and its "moves", each a list of the PDN
+            numbers of the squares of the move (two of them only for a
+            multi-jump written from start to end), and whether each move
+            is a "jump" in a parallel list "jumps"
+    '''
+    lines = []
+    moved = False
+    for line in file:
+        # a tag after moves starts the next game
+        if line.lstrip().startswith("[") and moved:
+            yield from _parse("".join(lines))
+            lines = []
+            moved = False
+        lines.append(line)
+        if not moved and line.strip() and not line.lstrip().startswith("["):
+            moved = True
+    if lines:
+        yield from _parse("".join(lines))
+
+def _parse(text):
+    '''
+    Parses the text of one game, or of several games without tags between
+    them, for read_pdn()
+    '''
+    game = _new_game()
+    depth = 0
+    for token in TOKENS.finditer(text):
+        if token.group("open"):
+            depth += 1
+        elif token.group("close"):
+            depth = max(depth - 1, 0)
+        elif depth:
+            # moves of a variation are not part of the game
+            continue
+        elif token.group("tag"):
+            game["tags"][token.group("tag")] = token.group("value")
+        elif token.group("move"):
+            move = token.group("move")
+            game["moves"].append([int(number) for number in
+                                  re.split(r"[-x:]", move)])
+            game["jumps"].append("x" in move or ":" in move)
+        elif token.group("result"):
+            game["winner"] = WINNERS[token.group("result")]
+            yield _finish(game)
+            game = _new_game()
+    if game["tags"] or game["moves"]:
+        if "Result" in game["tags"]:
+            game["winner"] = WINNERS.get(game["tags"]["Result"])
+        yield _finish(game)
+
+def _new_game():
+    return {"tags": {}, "rows": 3, "winner": None, "moves": [], "jumps": []}
+
+def _finish(game):
+    '''
+    Reads the board size of a parsed game from its GameType tag
+    '''
+    fields = game["tags"].get("GameType", "").split(",")
+    if len(fields) >= 4:
+        size = int(fields[2])
+        if size < 4 or size % 2 or int(fields[3]) != size:
+            raise ValueError
+        game["rows"] = (size - 2) // 2
+    return game
+
+def setup(board, fen):
+    '''
+    Sets up a position from a PDN FEN tag, e.g. "B:W18,24,K10:B12,16,K22"
+    for Black (RED) to move with white (BLACK) men on 18 and 24 and a white
+    king on 10. Ranges such as 1-12 are allowed.
+
+    Args:
+        board (CheckerBoard): the board to set up
+        fen (str): the value of the tag
+
+    Raises:
+        ValueError if the tag is malformed
+    '''
+    size = board.get_board_size()[0]
+    rows = [['l' if (i + j) % 2 == 0 else 'd' for j in range(size)]
+            for i in range(size)]
+    fields = fen.strip().rstrip(".").split(":")
+    if fields[0].upper() not in ("B", "W"):
+        raise ValueError
+    for field in fields[1:]:
+        if not field or field[0].upper() not in ("B", "W"):
+            raise ValueError
+        red = field[0].upper() == "B"
+        for square in filter(None, field[1:].split(",")):
+            king = square[0].upper() == "K"
+            square = square.lstrip("Kk")
+            first, _, last = square.partition("-")
+            for number in range(int(first), int(last or first) + 1):
+                row, col = square_loc(size, number)
+                letter = "r" if red else "b"
+                rows[row][col] = letter.upper() if king else letter
+    board.load_board(rows, RED if fields[0].upper() == "B" else BLACK)
+
+def load_game(board, game):
+    '''
+    Plays a game read by read_pdn() on a board, checking every move
+
+    Args:
+        board (CheckerBoard): a board of the size of the game, at the start
+            position
+        game (dict): the game
+
+    Raises:
+        ValueError if a move is not legal, or a multi-jump written from
+            start to end could be one of several
+
+    Returns:
+        list: the (loc, path) of each move, with every square of the
+            multi-jumps, as given to CheckerBoard.play()
+    '''
+    size = board.get_board_size()[0]
+    if "FEN" in game["tags"]:
+        setup(board, game["tags"]["FEN"])
+    played = []
+    for squares, jump in zip(game["moves"], game["jumps"]):
+        locs = [square_loc(size, number) for number in squares]
+        start, path = locs[0], locs[1:]
+        found = None
+        for loc, steps in board.legal_moves(board.get_turn()):
+            if loc != start or tuple(steps[-1]) != path[-1] or \
+                    (abs(steps[0][0] - loc[0]) == 2) != jump:
+                continue
+            if len(path) > 1 and [tuple(step) for step in steps] != path:
+                continue
+            if found is not None:
+                raise ValueError
+            found = (loc, list(steps))
+        if found is None:
+            raise ValueError
+        # the move comes from the board's own legal moves
+        board.apply_move(*found)
+        played.append(found)
+    return played
+
+
+@click.command(name="checker-pdn")
+@click.option('--from-pdn', type=click.File('r'), default=None,
+              help="PDN collection to read; every game is replayed and "
+                   "checked.")
+@click.option('--from-archive', type=click.Path(exists=True, dir_okay=False),
+              default=None, help="Archive file to export as PDN.")
+@click.option('-o', '--output', default=None,
+              help="Archive to append the games read from --from-pdn to, "
+                   "or PDN file to write the games of --from-archive to "
+                   "(- for the terminal).")
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              default="bitboard")
+def cmd(from_pdn, from_archive, output, engine):
+    if (from_pdn is None) == (from_archive is None):
+        raise click.UsageError("give one of --from-pdn and --from-archive")
+    start = time.perf_counter()
+    games = moves = 0
+    if from_archive is not None:
+        out = click.open_file(output or "-", "w")
+        for game in read_games(from_archive):
+            tags = {"Round": str(games + 1)}
+            if game["seed"] is not None:
+                tags["Seed"] = str(game["seed"])
+            out.write(game_text(game["moves"], game["rows"], game["winner"],
+                                tags))
+            games += 1
+            moves += len(game["moves"])
+        out.close()
+    else:
+        writer = GameWriter(output) if output else None
+        try:
+            for number, game in enumerate(read_pdn(from_pdn), 1):
+                board = new_board(game["rows"], engine)
+                try:
+                    played = load_game(board, game)
+                except ValueError:
+                    print(f'Game {number}: illegal move, skipped',
+                          file=sys.stderr)
+                    continue
+                # games set up from a position can't be archived from the
+                # start position
+                if writer is not None and "FEN" not in game["tags"]:
+                    writer.write_game(game["rows"], None, game["winner"],
+                                      played)
+                games += 1
+                moves += len(played)
+        finally:
+            if writer is not None:
+                writer.close()
+    elapsed = time.perf_counter() - start
+    print(f'{games} games, {moves} moves in {elapsed:.2f}s, '
+          f'{games / max(elapsed, 1e-9):,.0f} games/s', file=sys.stderr)
+
+if __name__ == "__main__":
+    cmd()
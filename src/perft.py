@@ -0,0 +1,148 @@
+'''
+Perft: counts the positions reachable in exactly N plies, as a throughput
+benchmark for move generation and as a correctness check between engines.
+
+Every engine must report the same counts for the same position and depth.
+'''
+import sys
+import time
+
+import click
+
+sys.path.append("./logic")
+from engines import ENGINES, new_board
+
+def perft(board, depth, stats=None):
+    '''
+    Counts the leaf nodes of the move tree below the current position, playing
+    moves on the board itself and taking them back.
+
+    Args:
+        board (CheckerBoard): the position to start from; the side to move is
+            board.get_turn()
+        depth (int): the number of plies to look ahead
+        stats (list[dict]): if given, stats[d] gets the counts of "nodes",
+            "captures", "promotions" and "multi_jumps" made at ply d + 1
+
+    Returns:
+        int: the number of positions reached after exactly depth plies
+    '''
+    if depth == 0:
+        return 1
+    if stats is not None:
+        while len(stats) < depth:
+            stats.append({"nodes": 0, "captures": 0, "promotions": 0,
+                          "multi_jumps": 0})
+    return _perft(board, depth, stats, 0)
+
+def _perft(board, depth, stats, ply):
+    '''
+    Recursive helper for perft(), at the given ply from the root
+    '''
+    moves = board.legal_moves(board.get_turn())
+    if stats is not None:
+        last_row = board.get_board_size()[0] - 1
+        counts = stats[ply]
+        counts["nodes"] += len(moves)
+        for loc, path in moves:
+            if abs(path[0][0] - loc[0]) == 2:
+                counts["captures"] += 1
+                if len(path) > 1:
+                    counts["multi_jumps"] += 1
+            if path[-1][0] in (0, last_row) and \
+                    not board.get_piece(loc).is_king:
+                counts["promotions"] += 1
+    # the last ply only needs the number of moves, not the moves themselves
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for loc, path in moves:
+        token = board.make_move(loc, path)
+        nodes += _perft(board, depth - 1, stats, ply + 1)
+        board.unmake_move(token)
+    return nodes
+
+def read_position(file):
+    '''
+    Reads a position saved as text: one line per row of the board using the
+    letters of CheckerBoard.return_board(), optionally followed by a line
+    with the player to move (RED or BLACK, RED by default).
+
+    Args:
+        file (file object): the open text file
+
+    Raises:
+        ValueError if the position is malformed
+
+    Returns:
+        (int, list[list[str]], str): the number of rows of pieces per player
+            to build the board with, the board and the player to move
+    '''
+    lines = [line.strip() for line in file if line.strip()]
+    turn = "RED"
+    if lines and lines[-1].upper() in ("RED", "BLACK"):
+        turn = lines.pop().upper()
+    size = len(lines)
+    if size < 4 or size % 2 == 1:
+        raise ValueError
+    return (size - 2) // 2, [list(line) for line in lines], turn
+
+
+@click.command(name="checker-perft")
+@click.option('-n', '--rows', type=click.IntRange(1, 9), multiple=True,
+              help="Rows of pieces per player, as in CheckerBoard(n). "
+                   "May be repeated.")
+@click.option('-d', '--depth', type=click.IntRange(1), default=5)
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              multiple=True,
+              help="Engine to run; repeat it to check that engines agree.")
+@click.option('--position', type=click.File('r'), default=None,
+              help="Text file with a position to start from.")
+def cmd(rows, depth, engine, position):
+    engines = engine or ("object",)
+    if position is not None:
+        try:
+            n, loaded, turn = read_position(position)
+            new_board(n).load_board(loaded)
+        except ValueError:
+            raise click.BadParameter("not a valid position",
+                                     param_hint="--position")
+        sizes = [n]
+    else:
+        loaded, turn = None, "RED"
+        sizes = rows or (3,)
+
+    mismatch = False
+    for n in sizes:
+        results = {}
+        for name in engines:
+            board = new_board(n, name)
+            if loaded is not None:
+                board.load_board(loaded, 1 if turn == "RED" else 2)
+            stats = []
+            start = time.perf_counter()
+            nodes = perft(board, depth, stats)
+            elapsed = time.perf_counter() - start
+            results[name] = nodes
+            searched = sum(counts["nodes"] for counts in stats)
+
+            print(f'{2 * n + 2}x{2 * n + 2} board, {name} engine')
+            print(f'{"depth":>5} {"nodes":>12} {"captures":>10} '
+                  f'{"promotions":>10} {"multi-jumps":>11}')
+            for ply, counts in enumerate(stats, 1):
+                print(f'{ply:>5} {counts["nodes"]:>12} '
+                      f'{counts["captures"]:>10} {counts["promotions"]:>10} '
+                      f'{counts["multi_jumps"]:>11}')
+            print(f'perft({depth}) = {nodes} in {elapsed:.3f}s, '
+                  f'{searched / max(elapsed, 1e-9):,.0f} nodes/s')
+            print()
+        if len(set(results.values())) > 1:
+            mismatch = True
+            print(f'MISMATCH for n={n}: {results}')
+    if mismatch:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,111 @@
+'''
+Replay of recorded games: rebuilds every position of every game, one at a
+time, as fast as the board engine allows.
+
+Games are given as in archive.read_games(): dicts with the "rows" of pieces
+for each player and the "moves" played, each a (loc, path) with every
+square of the multi-jumps. In verify mode every move is checked against the
+legal moves of the position (which the engine caches, so the check costs
+little more than the move); in trusted mode moves are applied without any
+check, for archives known to be good.
+'''
+import sys
+import time
+
+import click
+
+sys.path.append("./logic")
+from archive import read_games
+from engines import ENGINES, BoardPool
+
+def replay(game, board, verify=True):
+    '''
+    Replays a game on a board, yielding each position as it is reached
+
+    Args:
+        game (dict): the game, see the module docstring
+        board (CheckerBoard): a board of the size of the game; it is reset
+            first, and left at the last position
+        verify (bool): whether to check that every move is legal
+
+    Raises:
+        ValueError if verify is set and a move is not legal; the position
+            last yielded is the one it was played in
+
+    Returns:
+        generator of (int, CheckerBoard): the number of plies played and the
+            board, at the start then after every move. The board is the same
+            object every time, so anything kept from it must be copied
+            (e.g. with return_board() or clone()) before the next position
+    '''
+    board.reset()
+    yield 0, board
+    for ply, (loc, path) in enumerate(game["moves"], 1):
+        if verify:
+            loc, path = tuple(loc), [tuple(step) for step in path]
+            if (loc, path) not in board.legal_moves(board.get_turn()):
+                raise ValueError
+        board.apply_move(loc, path)
+        yield ply, board
+
+def replay_games(games, engine="bitboard", verify=True, pool=None):
+    '''
+    Replays games one after the other
+
+    Args:
+        games (iterable of dict): the games, see the module docstring
+        engine (str): the board engine to replay on, one of ENGINES
+        verify (bool): whether to check that every move is legal
+        pool (BoardPool): if given, boards are drawn from it and given back
+
+    Raises:
+        ValueError if verify is set and a move is not legal
+
+    Returns:
+        generator of (int, int, CheckerBoard): the number of the game
+            (counting from 0), the number of plies played and the board, for
+            every position of every game; see replay() about the board
+    '''
+    pool = pool or BoardPool()
+    for number, game in enumerate(games):
+        board = pool.acquire(game["rows"], engine)
+        try:
+            for ply, position in replay(game, board, verify):
+                yield number, ply, position
+        finally:
+            pool.release(board)
+
+
+@click.command(name="checker-replay")
+@click.option('--archive', type=click.Path(exists=True, dir_okay=False),
+              required=True, help="Archive file of the games to replay.")
+@click.option('--trusted', is_flag=True,
+              help="Apply the moves without checking them.")
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              default="bitboard")
+def cmd(archive, trusted, engine):
+    pool = BoardPool()
+    games = positions = illegal = 0
+    start = time.perf_counter()
+    for number, game in enumerate(read_games(archive)):
+        board = pool.acquire(game["rows"], engine)
+        try:
+            for ply, _ in replay(game, board, not trusted):
+                positions += 1
+        except ValueError:
+            illegal += 1
+            loc, path = game["moves"][ply]
+            print(f'Game {number}: illegal move {loc} -> {path} at ply '
+                  f'{ply + 1}')
+        pool.release(board)
+        games += 1
+    elapsed = time.perf_counter() - start
+    print(f'{games} games ({illegal} with an illegal move), {positions} '
+          f'positions in {elapsed:.2f}s, '
+          f'{positions / max(elapsed, 1e-9):,.0f} positions/s')
+    if illegal:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,248 @@
+'''
+Round-robin tournament: every pair of bots plays the same number of games
+with each colour on each board size, and the results are summed up in a
+table of scores, Elo ratings with their confidence intervals and the time
+each bot takes per move.
+
+The games of all the pairings are shared out to a pool of worker processes
+together, so that every worker stays busy until the last pairing is over.
+'''
+import itertools
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import click
+
+sys.path.append("./logic")
+from bot import (DRAW_PLIES, MAX_PLIES, PLAYER_TYPES, AlphaBetaBot, MCTSBot,
+                 game_seeds, play_game)
+from elo import elo_interval
+from engines import ENGINES, BoardPool
+
+def pairings(players, sizes):
+    '''
+    Lists the matches of a round-robin tournament, each pair of players
+    playing one with each colour on each board
+
+    Args:
+        players (list[str]): the types of the players, see bot.PLAYER_TYPES
+        sizes (list[int]): the numbers of rows of pieces for each player of
+                           the boards to play on
+
+    Returns:
+        list[(int, str, str)]: the board size, RED and BLACK player of each
+            match
+    '''
+    return [(rows, red, black) for rows in sizes
+            for first, second in itertools.combinations(players, 2)
+            for red, black in ((first, second), (second, first))]
+
+def _play_match(args):
+    '''
+    Plays a share of the games of a match, possibly in a worker process
+
+    Args:
+        args (tuple): the board size, RED and BLACK player of the match, the
+                      seeds of the games and the engine, options and
+                      draw_plies of bot.play_game()
+
+    Returns:
+        (tuple, list[dict]): the match and the records of its games
+    '''
+    match, seeds, engine, options, draw_plies = args
+    rows, red, black = match
+    pool = BoardPool()
+    bots = {}
+    return match, [play_game([red, black], engine, options, seed, None, pool,
+                             draw_plies, rows, False, bots)
+                   for seed in seeds]
+
+def play_tournament(players, sizes=(3,), games=100, engine="object",
+                    options=None, workers=1, seed=None,
+                    draw_plies=DRAW_PLIES):
+    '''
+    Plays a round-robin tournament, yielding the record of each game as soon
+    as it is over
+
+    Args:
+        players (list[str]): the types of the players, see bot.PLAYER_TYPES
+        sizes (list[int]): the numbers of rows of pieces for each player of
+                           the boards to play on
+        games (int): the number of games each pair plays with each colour on
+                     each board
+        engine (str): the board engine to play on, one of engines.ENGINES
+        options (dict): keyword arguments for the bots by player type, see
+                        bot.initialize_players()
+        workers (int): the number of processes to share the games out to
+        seed (int): the master seed the seed of each game is derived from;
+                    the games only depend on it, not on workers. Drawn from
+                    the random module if not given
+        draw_plies (int): see bot.play_game()
+
+    Returns:
+        generator of ((int, str, str), dict): the match of each game (see
+            pairings()) and its record (see bot.play_game())
+    '''
+    if seed is None:
+        seed = random.getrandbits(64)
+    matches = pairings(players, sizes)
+    seeds = game_seeds(seed, len(matches) * games)
+    # a few shares per match, small enough to keep every worker busy; the
+    # seeds are handed out in order, whatever order the shares finish in
+    size = max(1, min(-(-games // 4), 25))
+    shares = ((match, list(itertools.islice(seeds, min(size, games - first))),
+               engine, options, draw_plies)
+              for match in matches for first in range(0, games, size))
+
+    if workers == 1:
+        for args in shares:
+            match, records = _play_match(args)
+            for record in records:
+                yield match, record
+        return
+
+    pool = ProcessPoolExecutor(workers)
+    try:
+        pending = set()
+        while True:
+            # only a couple of shares per worker are sent ahead
+            for args in itertools.islice(shares, 2 * workers - len(pending)):
+                pending.add(pool.submit(_play_match, args))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                match, records = future.result()
+                for record in records:
+                    yield match, record
+    finally:
+        # also stops the games not started if the caller stops early
+        pool.shutdown(cancel_futures=True)
+
+def standings(results):
+    '''
+    Sums up the results of a tournament
+
+    Args:
+        results (iterable of ((int, str, str), dict)): the match and record
+            of each game, see play_tournament()
+
+    Returns:
+        dict{int : dict}: for each board size, "players" maps each player to
+            its "wins", "draws" and "losses" and the "moves" it played in
+            "seconds"; "scores" maps each (player, opponent) to the points
+            the player scored against the opponent and the games they played
+    '''
+    table = {}
+    for (rows, red, black), record in results:
+        board = table.setdefault(rows, {"players": {}, "scores": {}})
+        score = {"RED": 1.0, "BLACK": 0.0}.get(record["winner"], 0.5)
+        # RED plays the first move, so it plays the extra one of odd games
+        sides = ((red, black, score, (record["plies"] + 1) // 2,
+                  record["red_seconds"]),
+                 (black, red, 1 - score, record["plies"] // 2,
+                  record["black_seconds"]))
+        for player, opponent, points, moves, seconds in sides:
+            counts = board["players"].setdefault(player, {
+                "wins": 0, "draws": 0, "losses": 0, "moves": 0,
+                "seconds": 0.0})
+            counts[{1.0: "wins", 0.5: "draws", 0.0: "losses"}[points]] += 1
+            counts["moves"] += moves
+            counts["seconds"] += seconds
+            pair = board["scores"].setdefault((player, opponent), [0.0, 0])
+            pair[0] += points
+            pair[1] += 1
+    return table
+
+
+@click.command(name="checker-tournament")
+@click.option('-p', '--player',
+              type=click.Choice(PLAYER_TYPES, case_sensitive=False),
+              multiple=True,
+              help="Bot to enter, repeat it for each bot [default: random, "
+                   "smart and alphabeta].")
+@click.option('-r', '--rows', type=click.IntRange(1, 9), multiple=True,
+              help="Rows of pieces per player of a board to play on, as in "
+                   "CheckerBoard(n). May be repeated [default: 3].")
+@click.option('-n', '--num-games', type=click.IntRange(1), default=100,
+              show_default=True,
+              help="Games each pair plays with each colour on each board.")
+@click.option('--engine',
+              type=click.Choice(list(ENGINES), case_sensitive=False),
+              default="object")
+@click.option('-d', '--depth', type=click.IntRange(1), default=None,
+              help="Most plies alphabeta players look ahead "
+                   f"[default: {AlphaBetaBot.DEFAULT_DEPTH}, or "
+                   f"{AlphaBetaBot.MAX_DEPTH} with a budget].")
+@click.option('--time-budget-ms', type=click.IntRange(1), default=None,
+              help="Time an alphabeta or mcts player may take per move.")
+@click.option('--playouts', type=click.IntRange(1), default=None,
+              help="Games an mcts player plays out per move "
+                   f"[default: {MCTSBot.DEFAULT_PLAYOUTS} without a budget].")
+@click.option('-w', '--workers', type=click.IntRange(1), default=1,
+              show_default=True,
+              help="Processes to share the games out to.")
+@click.option('--seed', type=click.INT, default=None,
+              help="Master seed of the games; the same seed plays the same "
+                   "games, whatever the number of workers.")
+@click.option('--draw-plies', type=click.IntRange(1), default=DRAW_PLIES,
+              help="Plies without a capture or a promotion that draw a game "
+                   f"[default: no limit, games over {MAX_PLIES} plies are "
+                   "ties].")
+def cmd(player, rows, num_games, engine, depth, time_budget_ms, playouts,
+        workers, seed, draw_plies):
+    players = list(dict.fromkeys(name.lower() for name in player)) or \
+        ["random", "smart", "alphabeta"]
+    if len(players) < 2:
+        raise click.BadParameter("needs at least two different bots",
+                                 param_hint="--player")
+    options = {
+        "alphabeta": {"depth": depth, "time_budget_ms": time_budget_ms},
+        "mcts": {"playouts": playouts, "time_budget_ms": time_budget_ms}}
+    if seed is None:
+        seed = random.getrandbits(64)
+    start = time.perf_counter()
+    table = standings(play_tournament(players, rows or (3,), num_games,
+                                      engine, options, workers, seed,
+                                      draw_plies))
+    elapsed = time.perf_counter() - start
+
+    width = max(len(name) for name in players)
+    for size, board in sorted(table.items()):
+        print(f'{2 * size + 2}x{2 * size + 2} board')
+        print(f'{"bot":<{width}} {"games":>6} {"wins":>6} {"draws":>6} '
+              f'{"losses":>6} {"score":>6} {"Elo":>7} {"95% interval":>17} '
+              f'{"ms/move":>8}')
+        rated = []
+        for name, counts in board["players"].items():
+            wins, draws, losses = (counts["wins"], counts["draws"],
+                                   counts["losses"])
+            rated.append((elo_interval(wins, draws, losses), name, counts))
+        # the Elo of a bot is against the field of its opponents
+        for (elo, low, high), name, counts in sorted(rated, reverse=True):
+            games = counts["wins"] + counts["draws"] + counts["losses"]
+            score = (counts["wins"] + counts["draws"] / 2) / games
+            print(f'{name:<{width}} {games:>6} {counts["wins"]:>6} '
+                  f'{counts["draws"]:>6} {counts["losses"]:>6} '
+                  f'{100 * score:>5.1f}% {elo:>+7.0f} '
+                  f'{low:>+8.0f} to {high:>+5.0f} '
+                  f'{1000 * counts["seconds"] / max(counts["moves"], 1):>8.2f}')
+        print()
+        print(f'{"score of / vs":<{width}} ' +
+              ' '.join(f'{name:>{max(len(name), 6)}}' for name in players))
+        for name in players:
+            cells = []
+            for opponent in players:
+                points, games = board["scores"].get((name, opponent), (0, 0))
+                cell = f'{100 * points / games:.1f}%' if games else '-'
+                cells.append(f'{cell:>{max(len(opponent), 6)}}')
+            print(f'{name:<{width}} ' + ' '.join(cells))
+        print()
+    total = len(pairings(players, rows or (3,))) * num_games
+    print(f'{total} games in {elapsed:.2f}s')
+    print(f'Seed: {seed}')
+
+if __name__ == "__main__":
+    cmd()
@@ -1,7 +1,8 @@
 from ast import literal_eval as make_tuple
 import sys
 sys.path.append("./logic")
-from logic.board import CheckerBoard
+from logic.engines import ENGINES, new_board
+from archive import GameWriter
 from enum import Enum
 PieceColor = Enum("PieceColor", ["RED", "BLACK"])
 
@@ -86,24 +87,34 @@ def draw_board(board, select_pieces=False, select_moves=False):
     print(result)
 
 
-def play(n):
+def play(n, engine="object", writer=None):
     """
     Runs a game between two players, with the player in red starting first.
 
-    Input: n (int): the size of the board
+    Input: 
+        n (int): the size of the board
+        engine (str): the board engine to play on, one of ENGINES
+        writer (GameWriter): if given, the game is added to its archive
+            when it is over
 
     Return: 
         Winner (str): whether if a winner is produced or the game ends in tie
         Current game board (str): the board after each player makes their move
     """
     eofg = False
-    Board = CheckerBoard(int((n-2)/2))
+    Board = new_board(int((n-2)/2), engine)
+    if writer is not None:
+        writer.begin_game(int((n-2)/2))
     color = 'RED'
     while not eofg:
         winner = Board.game_ended()
         if winner != 'CONTINUE':
             print(winner, "!")
             eofg = True
+            if writer is not None:
+                writer.end_game(winner.split()[0])
+            # a drawn game still has moves, but it is over
+            break
         print()
         print('Current player: ', color)
         print()
@@ -111,7 +122,8 @@ def play(n):
             player = PieceColor.RED.value
         elif color == 'BLACK':
             player = PieceColor.BLACK.value
-        possible_pieces = Board.possible_pieces(player)
+        legal_moves = Board.legal_moves(player)
+        possible_pieces = {loc for loc, _ in legal_moves}
         board = Board.return_board()
         draw_board(board,select_pieces=possible_pieces)
         print()
@@ -120,7 +132,7 @@ def play(n):
             start_loc = make_tuple(input(f"Which piece do you want to move? \
                                          (movable pieces are highlighted in yellow) \
                                          (Hint: one of {possible_pieces})"))
-        possible_moves = Board.possible_moves(start_loc)
+        possible_moves = [path for loc, path in legal_moves if loc == start_loc]
         final_dests = {}
         for idx, loc in enumerate(possible_moves):
             final_dests[idx] = loc[-1]
@@ -134,6 +146,8 @@ def play(n):
         print("The move is from: " + str(start_loc) + " to: " + str(movement))
         index = list(filter(lambda x: final_dests[x] == movement, final_dests))[0]
         Board.play(start_loc, possible_moves[index])
+        if writer is not None:
+            writer.add_move(start_loc, possible_moves[index])
         if color == 'RED':
             color = 'BLACK'
         elif color == 'BLACK':
@@ -147,7 +161,20 @@ def play_game():
     while (n < 6 or n > 20) and n % 2 == 1:
         n = int(input("Size of the board? (Hint: input an even number from 6 to 20)"))
     print("Your input n is: " + str(n))
-    play(n)
+    engine = None
+    while engine not in ENGINES:
+        engine = input(f"Which engine? (Hint: one of {list(ENGINES)}, "
+                       "press enter for object)") or "object"
+    path = input("File to save the game to? (Hint: press enter to not "
+                 "save it)")
+    if not path:
+        play(n, engine)
+        return
+    writer = GameWriter(path)
+    try:
+        play(n, engine, writer)
+    finally:
+        writer.close()
 
 
 play_game()
\ No newline at end of file
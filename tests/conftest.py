@@ -0,0 +1,10 @@
+'''
+The modules of src import each other both as logic.<module> and, once
+./logic is on the path, as <module>, as when they are run from src.
+'''
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), "src")
+sys.path[:0] = [SRC, os.path.join(SRC, "logic")]
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from archive import LONG_STEPS, GameWriter, read_games
+from logic.engines import new_board
+
+def random_game(rows, seed, plies=300):
+    '''
+    Returns the moves of a random game played on the bitboard engine
+    '''
+    rng = random.Random(seed)
+    board = new_board(rows, "bitboard")
+    moves = []
+    while board.game_ended() == "CONTINUE" and len(moves) < plies:
+        loc, path = rng.choice(board.legal_moves(board.get_turn()))
+        board.apply_move(loc, path)
+        moves.append((tuple(loc), [tuple(step) for step in path]))
+    return moves
+
+def as_tuples(moves):
+    return [(tuple(loc), [tuple(step) for step in path])
+            for loc, path in moves]
+
+def test_games_read_back_as_written(tmp_path):
+    file = str(tmp_path / "games.ckr")
+    games = [(rows, seed, winner, random_game(rows, seed))
+             for seed, (rows, winner) in enumerate(
+                 [(1, "RED"), (2, "BLACK"), (3, "DRAW"), (4, None),
+                  (9, "RED")])]
+    with GameWriter(file) as writer:
+        for rows, seed, winner, moves in games[:3]:
+            writer.write_game(rows, seed, winner, moves)
+        # games fed a move at a time are saved without their seed
+        for rows, _, winner, moves in games[3:]:
+            writer.begin_game(rows)
+            for loc, path in moves:
+                writer.add_move(loc, path)
+            writer.end_game(winner)
+    back = [(game["rows"], game["seed"], game["winner"],
+             as_tuples(game["moves"])) for game in read_games(file)]
+    assert back == [(rows, seed if seed < 3 else None, winner, moves)
+                    for rows, seed, winner, moves in games]
+
+def test_long_multi_jumps_read_back(tmp_path):
+    # a king going round four men and back over its start square, and a
+    # jump of more than LONG_STEPS steps, which takes an extra byte
+    loop = ((2, 3), [(4, 5), (6, 3), (4, 1), (2, 3)])
+    down = [(3 + 2 * k, 2 * ((k + 1) % 2)) for k in range(10)]
+    zigzag = ((1, 0), (down + down[-2::-1] + [(1, 0)]) * 2)
+    assert len(zigzag[1]) > LONG_STEPS
+    file = str(tmp_path / "games.ckr")
+    with GameWriter(file) as writer:
+        writer.write_game(3, None, "RED", [loop])
+        writer.write_game(10, 7, None, [zigzag, loop])
+    assert [as_tuples(game["moves"]) for game in read_games(file)] == \
+        [[loop], [zigzag, loop]]
+
+def test_other_files_are_refused(tmp_path):
+    file = tmp_path / "other.txt"
+    file.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        GameWriter(str(file))
+    with pytest.raises(ValueError):
+        list(read_games(str(file)))
@@ -0,0 +1,58 @@
+import pytest
+
+from logic.engines import ENGINES, new_board
+
+RED, BLACK = 1, 2
+
+def empty_rows(size=8):
+    return [['l' if (i + j) % 2 == 0 else 'd' for j in range(size)]
+            for i in range(size)]
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_king_looping_back_ends_its_turn_at_the_leaf(engine):
+    # the king can jump around the four men and come back over its own
+    # start square, which the jump tree counts as taken
+    board = new_board(3, engine)
+    rows = empty_rows()
+    rows[2][3] = 'R'
+    for row, col in ((3, 4), (5, 4), (5, 2), (3, 2)):
+        rows[row][col] = 'b'
+    board.load_board(rows, RED)
+    key = board.get_hash()
+
+    loc, tree = (2, 3), board.jump_tree((2, 3))
+    path = []
+    while tree:
+        step = next(iter(tree))
+        tree = tree[step]
+        board.one_jump(loc, step, not tree)
+        loc = step
+        path.append(step)
+
+    assert board.get_turn() == BLACK
+    played = new_board(3, engine)
+    played.load_board(rows, RED)
+    assert played.get_hash() == key
+    played.apply_move((2, 3), path)
+    assert board.get_hash() == played.get_hash()
+    assert board.return_board() == played.return_board()
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_game_ended_follows_make_and_unmake_move(engine):
+    # black's last man is only blocked once red steps in front of it
+    board = new_board(3, engine)
+    rows = empty_rows()
+    rows[7][0] = 'b'
+    rows[5][0] = 'r'
+    rows[5][2] = 'r'
+    board.load_board(rows, RED)
+    assert board.game_ended() == "CONTINUE"
+
+    token = board.make_move((5, 0), [(6, 1)])
+    assert board.game_ended() == "RED WINS"
+    blocked = new_board(3, engine)
+    blocked.load_board(board.return_board(), BLACK)
+    assert blocked.game_ended() == "RED WINS"
+
+    board.unmake_move(token)
+    assert board.game_ended() == "CONTINUE"
@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from logic.engines import ENGINES, new_board
+from pdn import game_text, load_game, read_pdn, square_loc, square_number
+from test_archive import random_game
+
+def test_squares_are_numbered_from_one():
+    assert square_number(8, (0, 1)) == 1
+    assert square_number(8, (7, 6)) == 32
+    for number in range(1, 33):
+        assert square_number(8, square_loc(8, number)) == number
+    with pytest.raises(ValueError):
+        square_loc(8, 33)
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_games_read_back_as_written(engine):
+    games = [(rows, winner, random_game(rows, seed))
+             for seed, (rows, winner) in enumerate(
+                 [(3, "RED"), (3, "DRAW"), (2, "BLACK"), (4, None)])]
+    text = "".join(game_text(moves, rows, winner, {"Event": f"game {index}"})
+                   for index, (rows, winner, moves) in enumerate(games))
+    back = list(read_pdn(io.StringIO(text)))
+    assert len(back) == len(games)
+    for index, (game, (rows, winner, moves)) in enumerate(zip(back, games)):
+        assert game["tags"]["Event"] == f"game {index}"
+        assert (game["rows"], game["winner"]) == (rows, winner)
+        played = load_game(new_board(rows, engine), game)
+        assert [(tuple(loc), [tuple(step) for step in path])
+                for loc, path in played] == moves
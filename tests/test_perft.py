@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from logic.engines import ENGINES, new_board
+from perft import perft
+
+# perft of English checkers from the start position, depths 1 to 6
+START_COUNTS = [7, 49, 302, 1469, 7361, 36768]
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_start_position_counts(engine):
+    board = new_board(3, engine)
+    assert [perft(board, depth) for depth in range(1, 7)] == START_COUNTS
+    # perft takes back every move it makes
+    assert board.get_hash() == new_board(3, engine).get_hash()
+
+@pytest.mark.parametrize("rows", [1, 2, 4])
+def test_engines_agree_on_other_sizes(rows):
+    counts = {}
+    for engine in ENGINES:
+        stats = []
+        counts[engine] = (perft(new_board(rows, engine), 5, stats), stats)
+    assert counts["object"] == counts["bitboard"]
+
+@pytest.mark.parametrize("seed", range(4))
+def test_engines_agree_in_played_positions(seed):
+    # positions with kings and multi-jumps, reached by random games
+    rng = random.Random(seed)
+    board = new_board(3, "bitboard")
+    for _ in range(40):
+        moves = board.legal_moves(board.get_turn())
+        if not moves:
+            break
+        board.apply_move(*rng.choice(moves))
+    counts = {}
+    for engine in ENGINES:
+        other = new_board(3, engine)
+        other.load_board(board.return_board(), board.get_turn())
+        stats = []
+        counts[engine] = (perft(other, 4, stats), stats)
+    assert counts["object"] == counts["bitboard"]